@@ -1,12 +1,20 @@
 from django.contrib import admin
+from django.db import models
 
-from blog.models import Category, Location, Post
+from blog.forms import BoundedImageField
+from blog.models import Category, ImageBlob, ImageJob, Location, Post
 
 admin.site.empty_value_display = 'Не задано'
 
+# Uploads through the admin get the same checks as through the site.
+IMAGE_FIELD_OVERRIDES = {
+    models.ImageField: {'form_class': BoundedImageField},
+}
+
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
+    formfield_overrides = IMAGE_FIELD_OVERRIDES
     list_display = (
         'title',
         'is_published',
@@ -25,6 +33,7 @@ class PostAdmin(admin.ModelAdmin):
 
 class PostInline(admin.TabularInline):
     model = Post
+    formfield_overrides = IMAGE_FIELD_OVERRIDES
     extra = 0
 
 
@@ -47,3 +56,27 @@ class CategoryAdmin(admin.ModelAdmin):
         'description',
     )
     list_editable = ('is_published',)
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'image',
+        'post',
+        'status',
+        'attempts',
+        'created_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('post', 'image', 'created_at', 'started_at', 'error')
+
+
+@admin.register(ImageBlob)
+class ImageBlobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'references',
+        'updated_at',
+    )
+    search_fields = ('name',)
+    readonly_fields = ('name', 'references', 'updated_at')
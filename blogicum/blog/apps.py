@@ -1,7 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.signals import request_started
 
 
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
     verbose_name = 'Блог'
+
+    def ready(self):
+        import blog.signals  # noqa: F401
+
+        if settings.BLOG_WARM_ON_START:
+            from blog.warmup import warm_on_start
+
+            request_started.connect(warm_on_start)
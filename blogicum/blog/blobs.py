@@ -0,0 +1,139 @@
+import os
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.utils import timezone
+
+from blog.models import ImageBlob, Post
+from blog.storage import image_storage, is_hashed_name
+
+BATCH_SIZE = 500
+
+
+def get_post_files(
+    image: Optional[str], renditions: Optional[Dict[str, str]]
+) -> List[str]:
+    """Storage names a post refers to: its image and the renditions."""
+    if not image:
+        return []
+    return [image, *(renditions or {}).values()]
+
+
+def _group_by_count(names: Iterable[str]) -> Dict[int, List[str]]:
+    groups = defaultdict(list)
+    for name, count in Counter(names).items():
+        groups[count].append(name)
+    return groups
+
+
+def add_references(names: Iterable[str]) -> None:
+    names = list(names)
+    if not names:
+        return
+    ImageBlob.objects.bulk_create(
+        [ImageBlob(name=name) for name in set(names)], ignore_conflicts=True
+    )
+    for count, group in _group_by_count(names).items():
+        ImageBlob.objects.filter(name__in=group).update(
+            references=F('references') + count, updated_at=timezone.now()
+        )
+
+
+def drop_references(names: Iterable[str]) -> None:
+    for count, group in _group_by_count(names).items():
+        ImageBlob.objects.filter(
+            name__in=group, references__gte=count
+        ).update(
+            references=F('references') - count, updated_at=timezone.now()
+        )
+
+
+def replace_references(old: Iterable[str], new: Iterable[str]) -> None:
+    old, new = Counter(old), Counter(new)
+    drop_references((old - new).elements())
+    add_references((new - old).elements())
+
+
+def rebuild_references() -> int:
+    """Recounts the references of all files from the posts."""
+    counts = Counter()
+    posts = Post.objects.exclude(image='').values_list('image', 'renditions')
+    for image, renditions in posts.iterator():
+        counts.update(get_post_files(image, renditions))
+    with transaction.atomic():
+        ImageBlob.objects.update(references=0)
+        ImageBlob.objects.bulk_create(
+            [ImageBlob(name=name) for name in counts],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+        for count, group in _group_by_count(counts.elements()).items():
+            for start in range(0, len(group), BATCH_SIZE):
+                ImageBlob.objects.filter(
+                    name__in=group[start:start + BATCH_SIZE]
+                ).update(references=count)
+    return len(counts)
+
+
+def walk_storage(directory: str = '') -> Iterator[str]:
+    directories, files = image_storage.listdir(directory)
+    for name in files:
+        yield os.path.join(directory, name).replace(os.sep, '/')
+    for name in directories:
+        yield from walk_storage(os.path.join(directory, name))
+
+
+def _is_recent(name: str, since: datetime) -> bool:
+    try:
+        return image_storage.get_modified_time(name) >= since
+    except FileNotFoundError:
+        return False
+
+
+def _collect_blob(pk: int, unused: QuerySet, since: datetime) -> Optional[str]:
+    """Deletes an unused file and its record, unless it was wanted again.
+
+    The record stays locked while the file is checked and deleted, so a
+    reference counted meanwhile waits for the outcome; a re-upload
+    touches the file, which is checked once more right before it goes.
+    """
+    with transaction.atomic():
+        blob = unused.select_for_update().filter(pk=pk).first()
+        if blob is None or _is_recent(blob.name, since):
+            return None
+        blob.delete()
+        if _is_recent(blob.name, since):
+            transaction.set_rollback(True)
+            return None
+        image_storage.delete(blob.name)
+    return blob.name
+
+
+def collect_garbage(grace: timedelta, scan: bool = False) -> List[str]:
+    """Deletes files nobody refers to for at least ``grace``.
+
+    A file uploaded again is touched by the storage, so one that was just
+    re-uploaded is kept even if its reference is not counted yet. With
+    ``scan`` the storage is also walked for files without any record,
+    e.g. left by a crashed upload.
+    """
+    since = timezone.now() - grace
+    removed = []
+    unused = ImageBlob.objects.filter(references=0, updated_at__lt=since)
+    for pk in list(unused.values_list('pk', flat=True)):
+        name = _collect_blob(pk, unused, since)
+        if name is not None:
+            removed.append(name)
+    if scan:
+        for name in walk_storage():
+            if (
+                is_hashed_name(name)
+                and not _is_recent(name, since)
+                and not ImageBlob.objects.filter(name=name).exists()
+            ):
+                image_storage.delete(name)
+                removed.append(name)
+    return removed
@@ -0,0 +1,256 @@
+import hashlib
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpRequest
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+from blog.models import Post
+from blog.templatetags.blog_tags import HOLE_PATTERN
+
+INDEX_SCOPE = 'index'
+TAXONOMY_SCOPE = 'taxonomy'
+CARD_TEMPLATE = 'includes/post_card.html'
+# Cards at the top of a page are likely above the fold: their images are
+# loaded right away, those of the rest lazily.
+EAGER_CARDS: int = 2
+REFILL_LOCK_TIMEOUT: int = 10
+REFILL_WAIT: float = 2.0
+REFILL_POLL_INTERVAL: float = 0.05
+
+# Refills running in this process, by key and stamp.
+_refills: Dict[Tuple[str, str], Future] = {}
+_refills_lock = threading.Lock()
+
+
+def category_scope(slug: str) -> str:
+    return f'category:{slug}'
+
+
+def profile_scope(username: str) -> str:
+    return f'profile:{username}'
+
+
+def post_scope(pk: int) -> str:
+    return f'post:{pk}'
+
+
+def _version_key(scope: str) -> str:
+    return f'blog:version:{scope}'
+
+
+def _new_version() -> int:
+    return time.time_ns()
+
+
+def get_versions(scopes: Iterable[str]) -> List[int]:
+    """Current version stamps of the scopes, missing ones are created."""
+    scopes = list(scopes)
+    keys = [_version_key(scope) for scope in scopes]
+    versions = cache.get_many(keys)
+    missing = {key: _new_version() for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def bump_versions(scopes: Iterable[str]) -> None:
+    """Retires everything cached for the scopes.
+
+    The stamps are bumped again after the transaction commits: a page
+    rendered by another request in between still saw the old data.
+    """
+    keys = [_version_key(scope) for scope in set(scopes)]
+
+    def bump():
+        version = _new_version()
+        cache.set_many({key: version for key in keys}, None)
+
+    bump()
+    transaction.on_commit(bump)
+
+
+def make_etag(request: HttpRequest, versions: Iterable[int]) -> str:
+    """Validator of a page that depends on the versions and the viewer.
+
+    For a logged in user the CSRF cookie is part of it, so a page with a
+    token from an earlier session is never revalidated.
+    """
+    user = request.user
+    viewer = (
+        f'{user.pk}:{user.username}:'
+        f'{request.COOKIES.get(settings.CSRF_COOKIE_NAME, "")}'
+        if user.is_authenticated
+        else 'anonymous'
+    )
+    digest = hashlib.md5(
+        '|'.join([viewer, *map(str, versions)]).encode()
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def make_stamped_key(
+    prefix: str, scopes: Iterable[str], *parts: str
+) -> Tuple[str, str]:
+    """Key of an entry and the stamp of its scopes' current versions."""
+    scopes = list(scopes)
+    stamp = '.'.join(str(version) for version in get_versions(scopes))
+    digest = hashlib.md5(
+        '|'.join([*scopes, *parts]).encode()
+    ).hexdigest()
+    return f'blog:{prefix}:{digest}', stamp
+
+
+def get_or_refill(
+    key: str, stamp: str, compute: Callable[[], Any], timeout: int
+) -> Tuple[Any, bool]:
+    """Returns the value cached under the key and whether it is fresh.
+
+    An entry is fresh when it was computed for the current stamp. On a
+    miss only one caller recomputes it: requests of this process wait for
+    the running refill, other workers get the stale value while the
+    refill holds a short lock in the cache (or wait for it when there is
+    nothing stale to serve). A request whose refill fails or takes longer
+    than REFILL_WAIT serves the stale value, or computes one itself.
+    ``compute`` may return None for a value that must not be cached.
+    """
+    entry = cache.get(key)
+    if entry is not None and entry['stamp'] == stamp:
+        return entry['value'], True
+
+    with _refills_lock:
+        refill = _refills.get((key, stamp))
+        is_leader = refill is None
+        if is_leader:
+            refill = _refills[key, stamp] = Future()
+    if not is_leader:
+        try:
+            return refill.result(timeout=REFILL_WAIT)
+        except Exception:
+            # The leader's error is raised in its own request.
+            if entry is not None:
+                return entry['value'], False
+            return compute(), True
+
+    try:
+        result = _refill(key, stamp, entry, compute, timeout)
+    except BaseException as error:
+        refill.set_exception(error)
+        raise
+    else:
+        refill.set_result(result)
+        return result
+    finally:
+        with _refills_lock:
+            del _refills[key, stamp]
+
+
+def _refill(
+    key: str,
+    stamp: str,
+    entry: Optional[Dict[str, Any]],
+    compute: Callable[[], Any],
+    timeout: int,
+) -> Tuple[Any, bool]:
+    lock_key = f'{key}:refill'
+    if not cache.add(lock_key, stamp, REFILL_LOCK_TIMEOUT):
+        if entry is not None:
+            return entry['value'], False
+        deadline = time.monotonic() + REFILL_WAIT
+        while time.monotonic() < deadline:
+            time.sleep(REFILL_POLL_INTERVAL)
+            entry = cache.get(key)
+            if entry is not None and entry['stamp'] == stamp:
+                return entry['value'], True
+        return compute(), True
+    try:
+        value = compute()
+        if value is not None:
+            cache.set(key, {'stamp': stamp, 'value': value}, timeout)
+        return value, True
+    finally:
+        cache.delete(lock_key)
+
+
+def render_post_cards(posts: Iterable[Post]) -> None:
+    """Sets ``card_html`` of every post to its rendered card.
+
+    Cards are cached by post revision: its id, ``updated_at`` and comment
+    counter, plus the author name and the taxonomy version for the joined
+    parts, and whether the image is loaded lazily. A page looks all of its
+    cards up with one ``get_many``.
+    """
+    posts = list(posts)
+    timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+    (taxonomy_version,) = get_versions([TAXONOMY_SCOPE])
+    lazy = {
+        post.pk: position >= EAGER_CARDS
+        for position, post in enumerate(posts)
+    }
+    keys = {
+        post.pk: make_card_key(post, taxonomy_version, lazy[post.pk])
+        for post in posts
+    }
+    cached = cache.get_many(keys.values()) if timeout else {}
+    rendered = {}
+    for post in posts:
+        key = keys[post.pk]
+        html = cached.get(key)
+        if html is None:
+            html = rendered[key] = render_to_string(
+                CARD_TEMPLATE, {'post': post, 'lazy_image': lazy[post.pk]}
+            )
+        post.card_html = mark_safe(html)
+    if rendered and timeout:
+        cache.set_many(rendered, timeout)
+
+
+def make_card_key(
+    post: Post, taxonomy_version: int, lazy_image: bool = False
+) -> str:
+    revision = '|'.join(
+        str(part)
+        for part in (
+            post.updated_at.isoformat(),
+            post.comment_count,
+            post.author.username,
+            taxonomy_version,
+            lazy_image,
+        )
+    )
+    digest = hashlib.md5(revision.encode()).hexdigest()
+    return f'blog:card:{post.pk}:{digest}'
+
+
+def fill_holes(
+    content: str,
+    context: Dict[str, Any],
+    request: HttpRequest,
+    user: Optional[Any] = None,
+) -> str:
+    """Renders the per-user fragments left out of a cached page.
+
+    Without ``user`` the fragments are rendered for the request's user,
+    otherwise for the given one.
+    """
+    if user is not None:
+        context = {**context, 'request': request, 'user': user}
+        request = None
+    fragments = {}
+
+    def render(match):
+        template_name = match.group(1)
+        if template_name not in fragments:
+            fragments[template_name] = render_to_string(
+                template_name, context, request
+            )
+        return fragments[template_name]
+
+    return HOLE_PATTERN.sub(render, content)
@@ -0,0 +1,244 @@
+import pickle
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+STAMP_SUFFIX = ':stamp'
+
+
+def _stamp_key(key: str) -> str:
+    return f'{key}{STAMP_SUFFIX}'
+
+
+def is_process_local(cache: BaseCache) -> bool:
+    """Whether what is cached stays invisible to the other processes."""
+    if isinstance(cache, TwoTierCache):
+        return is_process_local(cache.shared)
+    return isinstance(cache, (LocMemCache, DummyCache))
+
+
+class _Entry:
+    __slots__ = ('stamp', 'pickled', 'checked_at')
+
+    def __init__(self, stamp: str, pickled: bytes, checked_at: float):
+        self.stamp = stamp
+        self.pickled = pickled
+        self.checked_at = checked_at
+
+
+class TwoTierCache(BaseCache):
+    """A bounded in-process LRU in front of a cache shared by the workers.
+
+    LOCATION is the alias of the shared cache. Every value written there
+    gets a random stamp stored next to it. A local copy is trusted for
+    CHECK_INTERVAL seconds, then revalidated by fetching only its stamp:
+    a copy overwritten, deleted or expired in the shared tier is dropped.
+    The local tier keeps at most MAX_ENTRIES values and MAX_BYTES of
+    pickled data, evicting the least recently used ones.
+    """
+
+    def __init__(self, location: str, params: Dict[str, Any]):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._shared_alias = location
+        self._max_bytes = int(options.get('MAX_BYTES', 16 * 1024 * 1024))
+        self._check_interval = float(options.get('CHECK_INTERVAL', 1.0))
+        self._local: 'OrderedDict[str, _Entry]' = OrderedDict()
+        self._local_bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def shared(self) -> BaseCache:
+        return caches[self._shared_alias]
+
+    def _local_key(self, key: str, version: Optional[int]) -> str:
+        local_key = self.make_key(key, version=version)
+        self.validate_key(local_key)
+        return local_key
+
+    def _forget(self, local_key: str) -> None:
+        entry = self._local.pop(local_key, None)
+        if entry is not None:
+            self._local_bytes -= len(entry.pickled)
+
+    def _remember(self, local_key: str, stamp: str, value: Any) -> None:
+        pickled = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._forget(local_key)
+            if len(pickled) > self._max_bytes:
+                return
+            self._local[local_key] = _Entry(
+                stamp, pickled, time.monotonic()
+            )
+            self._local_bytes += len(pickled)
+            while (
+                len(self._local) > self._max_entries
+                or self._local_bytes > self._max_bytes
+            ):
+                _, evicted = self._local.popitem(last=False)
+                self._local_bytes -= len(evicted.pickled)
+
+    def _get_local(
+        self, keys: List[str], version: Optional[int]
+    ) -> Tuple[Dict[str, bytes], List[str]]:
+        """Local copies of the keys, revalidated when due, and the misses."""
+        now = time.monotonic()
+        found, unchecked, missing = {}, {}, []
+        with self._lock:
+            for key in keys:
+                local_key = self._local_key(key, version)
+                entry = self._local.get(local_key)
+                if entry is None:
+                    missing.append(key)
+                    continue
+                self._local.move_to_end(local_key)
+                if now - entry.checked_at < self._check_interval:
+                    found[key] = entry.pickled
+                else:
+                    unchecked[key] = entry
+        if unchecked:
+            stamps = self.shared.get_many(
+                [_stamp_key(key) for key in unchecked], version=version
+            )
+            for key, entry in unchecked.items():
+                if stamps.get(_stamp_key(key)) == entry.stamp:
+                    entry.checked_at = now
+                    found[key] = entry.pickled
+                else:
+                    missing.append(key)
+        return found, missing
+
+    def _get_shared(
+        self, keys: List[str], version: Optional[int]
+    ) -> Dict[str, Any]:
+        fetched = self.shared.get_many(
+            [*keys, *map(_stamp_key, keys)], version=version
+        )
+        result = {}
+        for key in keys:
+            local_key = self._local_key(key, version)
+            stamp = fetched.get(_stamp_key(key))
+            if key in fetched:
+                result[key] = fetched[key]
+            if key in fetched and stamp is not None:
+                self._remember(local_key, stamp, fetched[key])
+            else:
+                with self._lock:
+                    self._forget(local_key)
+        return result
+
+    def get_many(
+        self, keys: Iterable[str], version: Optional[int] = None
+    ) -> Dict[str, Any]:
+        keys = list(keys)
+        found, missing = self._get_local(keys, version)
+        result = {key: pickle.loads(pickled) for key, pickled in found.items()}
+        if missing:
+            result.update(self._get_shared(missing, version))
+        return {key: result[key] for key in keys if key in result}
+
+    def get(
+        self, key: str, default: Any = None, version: Optional[int] = None
+    ) -> Any:
+        return self.get_many([key], version=version).get(key, default)
+
+    def set_many(
+        self,
+        data: Dict[str, Any],
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> List[str]:
+        stamps = {key: uuid.uuid4().hex for key in data}
+        failed = self.shared.set_many(
+            {
+                **data,
+                **{_stamp_key(key): stamp for key, stamp in stamps.items()},
+            },
+            timeout=timeout,
+            version=version,
+        )
+        failed_keys = {
+            key[:-len(STAMP_SUFFIX)] if key.endswith(STAMP_SUFFIX) else key
+            for key in failed
+        }
+        for key, value in data.items():
+            local_key = self._local_key(key, version)
+            if key in failed_keys:
+                with self._lock:
+                    self._forget(local_key)
+            else:
+                self._remember(local_key, stamps[key], value)
+        return [key for key in data if key in failed_keys]
+
+    def set(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> None:
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def add(
+        self,
+        key: str,
+        value: Any,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> bool:
+        if not self.shared.add(key, value, timeout=timeout, version=version):
+            return False
+        stamp = uuid.uuid4().hex
+        self.shared.set(
+            _stamp_key(key), stamp, timeout=timeout, version=version
+        )
+        self._remember(self._local_key(key, version), stamp, value)
+        return True
+
+    def touch(
+        self,
+        key: str,
+        timeout: Any = DEFAULT_TIMEOUT,
+        version: Optional[int] = None,
+    ) -> bool:
+        self.shared.touch(_stamp_key(key), timeout=timeout, version=version)
+        return self.shared.touch(key, timeout=timeout, version=version)
+
+    def incr(
+        self, key: str, delta: int = 1, version: Optional[int] = None
+    ) -> int:
+        value = self.shared.incr(key, delta, version=version)
+        stamp = uuid.uuid4().hex
+        self.shared.set(_stamp_key(key), stamp, version=version)
+        self._remember(self._local_key(key, version), stamp, value)
+        return value
+
+    def delete_many(
+        self, keys: Iterable[str], version: Optional[int] = None
+    ) -> None:
+        keys = list(keys)
+        with self._lock:
+            for key in keys:
+                self._forget(self._local_key(key, version))
+        self.shared.delete_many(
+            [*keys, *map(_stamp_key, keys)], version=version
+        )
+
+    def delete(self, key: str, version: Optional[int] = None) -> bool:
+        with self._lock:
+            self._forget(self._local_key(key, version))
+        self.shared.delete(_stamp_key(key), version=version)
+        return self.shared.delete(key, version=version)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+            self._local_bytes = 0
+        self.shared.clear()
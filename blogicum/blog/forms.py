@@ -1,12 +1,30 @@
 from django import forms
 
 from blog.models import Post, User, Comment
+from blog.uploads import check_image_header, check_upload_size
+
+
+class BoundedImageField(forms.ImageField):
+    """Image field that checks the upload size and the image header before
+    Django opens the image to verify it."""
+
+    def to_python(self, data):
+        if data in self.empty_values:
+            return None
+        check_upload_size(data)
+        if hasattr(data, 'temporary_file_path'):
+            with open(data.temporary_file_path(), 'rb') as file:
+                check_image_header(file)
+        else:
+            check_image_header(data)
+        return super().to_python(data)
 
 
 class PostForm(forms.ModelForm):
     class Meta:
         model = Post
         exclude = ('author',)
+        field_classes = {'image': BoundedImageField}
         widgets = {'pub_date': forms.DateTimeInput(attrs={'type': 'datetime'})}
 
 
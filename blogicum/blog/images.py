@@ -0,0 +1,145 @@
+import logging
+import os
+import re
+from io import BytesIO
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from blog.storage import image_storage
+
+try:
+    import pillow_avif  # noqa: F401 registers the AVIF plugin
+except ImportError:
+    pass
+
+logger = logging.getLogger('blog.images')
+
+# Widths in pixels the post images are rendered at, for srcset.
+RENDITION_WIDTHS: Tuple[int, ...] = (320, 640, 960, 1280, 1920)
+# Formats the renditions are encoded to besides the fallback one, best
+# first. Those Pillow can't write are skipped: AVIF needs the optional
+# pillow-avif-plugin.
+MODERN_FORMATS: Tuple[str, ...] = ('AVIF', 'WEBP')
+# Formats older browsers can show, the others are re-encoded to JPEG.
+FALLBACK_FORMATS: Tuple[str, ...] = ('JPEG', 'PNG')
+EXTENSIONS: Dict[str, str] = {
+    'AVIF': '.avif',
+    'WEBP': '.webp',
+    'JPEG': '.jpg',
+    'PNG': '.png',
+}
+# Modes every format can encode and resize does not degrade; the others,
+# e.g. palette ones, are converted first.
+MODES: Tuple[str, ...] = ('RGB', 'RGBA', 'L', 'LA')
+MIME_TYPES: Dict[str, str] = {
+    'AVIF': 'image/avif',
+    'WEBP': 'image/webp',
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+}
+ORIGINAL = 'original'
+SAVE_OPTIONS: Dict[str, Dict[str, object]] = {
+    'AVIF': {'quality': 60},
+    'WEBP': {'quality': 80, 'method': 4},
+    'JPEG': {'quality': 85, 'optimize': True, 'progressive': True},
+    'PNG': {'optimize': True},
+}
+RENDITION_KEY = re.compile(r'^(\d+)x(\d+)\.([A-Z]+)$')
+
+
+class Rendition(NamedTuple):
+    width: int
+    height: int
+    format: str
+
+    @property
+    def key(self) -> str:
+        return f'{self.width}x{self.height}.{self.format}'
+
+    @classmethod
+    def parse(cls, key: str) -> Optional['Rendition']:
+        match = RENDITION_KEY.match(key)
+        if match is None:
+            return None
+        width, height, format = match.groups()
+        return cls(int(width), int(height), format)
+
+
+def get_formats(format: Optional[str], has_alpha: bool) -> List[str]:
+    """Formats to encode an image to, the fallback one last."""
+    Image.init()
+    formats = [name for name in MODERN_FORMATS if name in Image.SAVE]
+    if format not in FALLBACK_FORMATS:
+        format = 'PNG' if has_alpha else 'JPEG'
+    return [*formats, format]
+
+
+def get_widths(width: int) -> List[int]:
+    """Rendition widths for an image, largest first; never upscaled."""
+    widths = [size for size in RENDITION_WIDTHS if size < width]
+    if width <= RENDITION_WIDTHS[-1]:
+        widths.append(width)
+    return sorted(widths, reverse=True)
+
+
+def get_rendition_name(name: str, width: int, format: str) -> str:
+    root = os.path.splitext(name)[0]
+    return f'{root}.{width}{EXTENSIONS[format]}'
+
+
+def resize(image: Image.Image, width: int) -> Image.Image:
+    if image.width <= width:
+        return image
+    height = max(1, round(image.height * width / image.width))
+    return image.resize((width, height), Image.Resampling.LANCZOS)
+
+
+def encode(image: Image.Image, format: str) -> bytes:
+    if format == 'JPEG' and image.mode not in ('RGB', 'L'):
+        image = image.convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format, **SAVE_OPTIONS.get(format, {}))
+    return buffer.getvalue()
+
+
+def has_alpha(image: Image.Image) -> bool:
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        image.mode == 'P' and 'transparency' in image.info
+    )
+
+
+def render_renditions(name: str) -> Dict[str, str]:
+    """Saves copies of the image at every rendition width and format.
+
+    Returns the storage names of the copies by ``Rendition.key``. Every
+    width is scaled down from the previous, larger one, which is much
+    cheaper than from the original and looks the same. Images are never
+    upscaled; one that can't be decoded is shown as is, as its only
+    ``original`` rendition. Runs in the image worker processes, so it
+    touches nothing but the storage.
+    """
+    try:
+        with image_storage.open(name) as file:
+            original = Image.open(file)
+            format = original.format
+            original = ImageOps.exif_transpose(original)
+    except (OSError, Image.DecompressionBombError):
+        logger.exception('Cannot read image %s', name)
+        return {ORIGINAL: name}
+    alpha = has_alpha(original)
+    if original.mode not in MODES:
+        original = original.convert('RGBA' if alpha else 'RGB')
+    formats = get_formats(format, alpha)
+    renditions = {}
+    image = original
+    for width in get_widths(original.width):
+        image = resize(image, width)
+        for target in formats:
+            rendition = Rendition(image.width, image.height, target)
+            renditions[rendition.key] = image_storage.save(
+                get_rendition_name(name, width, target),
+                ContentFile(encode(image, target)),
+            )
+    return renditions
@@ -0,0 +1,81 @@
+from datetime import timedelta
+from typing import Dict, List
+
+from django.db.models import F
+from django.utils import timezone
+
+from blog.blobs import replace_references
+from blog.cache import bump_versions
+from blog.images import ORIGINAL
+from blog.models import ImageJob, Post
+from blog.services import get_post_feed_scopes
+
+MAX_ATTEMPTS: int = 3
+# A job running longer than this is taken for one of a crashed worker.
+RUNNING_TIMEOUT = timedelta(minutes=10)
+
+
+def enqueue_renditions(post: Post) -> ImageJob:
+    return ImageJob.objects.create(post=post, image=post.image.name)
+
+
+def release_stuck_jobs() -> int:
+    return ImageJob.objects.filter(
+        status=ImageJob.Status.RUNNING,
+        started_at__lt=timezone.now() - RUNNING_TIMEOUT,
+    ).update(status=ImageJob.Status.PENDING)
+
+
+def claim_jobs(limit: int) -> List[ImageJob]:
+    """Takes up to ``limit`` of the oldest pending jobs.
+
+    Every job is claimed by a conditional UPDATE, so workers polling the
+    same queue never take one job twice.
+    """
+    pending = ImageJob.objects.filter(status=ImageJob.Status.PENDING)
+    claimed = [
+        pk
+        for pk in pending.values_list('pk', flat=True)[:limit]
+        if pending.filter(pk=pk).update(
+            status=ImageJob.Status.RUNNING,
+            started_at=timezone.now(),
+            attempts=F('attempts') + 1,
+        )
+    ]
+    return list(
+        ImageJob.objects.select_related('post__author').filter(
+            pk__in=claimed
+        )
+    )
+
+
+def is_outdated(job: ImageJob) -> bool:
+    """Whether the post image was replaced after the job was queued."""
+    return job.post.image.name != job.image
+
+
+def store_renditions(job: ImageJob, renditions: Dict[str, str]) -> None:
+    post = job.post
+    if Post.objects.filter(pk=post.pk, image=job.image).update(
+        renditions=renditions, updated_at=timezone.now()
+    ):
+        replace_references(post.renditions.values(), renditions.values())
+        bump_versions(get_post_feed_scopes(post))
+
+
+def finish_job(job: ImageJob, renditions: Dict[str, str]) -> None:
+    store_renditions(job, renditions)
+    job.status = ImageJob.Status.DONE
+    job.save(update_fields=['status'])
+
+
+def fail_job(job: ImageJob, error: str) -> None:
+    """Puts the job back in the queue, or gives up after MAX_ATTEMPTS and
+    shows the original image instead."""
+    job.error = error
+    if job.attempts < MAX_ATTEMPTS:
+        job.status = ImageJob.Status.PENDING
+    else:
+        job.status = ImageJob.Status.FAILED
+        store_renditions(job, {ORIGINAL: job.image})
+    job.save(update_fields=['status', 'error'])
@@ -0,0 +1,105 @@
+import random
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+LOCAL_TIER_OPTIONS = {
+    'MAX_ENTRIES': 1000,
+    'MAX_BYTES': 32 * 1024 * 1024,
+    'CHECK_INTERVAL': 1.0,
+}
+
+
+def get_bench_caches(directory: str) -> Dict[str, Dict[str, Any]]:
+    return {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        },
+        'locmem': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'bench',
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+        'file': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': directory,
+            'OPTIONS': {'MAX_ENTRIES': 100000},
+        },
+        'two-tier/locmem': {
+            'BACKEND': 'blog.cache_backends.TwoTierCache',
+            'LOCATION': 'locmem',
+            'OPTIONS': LOCAL_TIER_OPTIONS,
+        },
+        'two-tier/file': {
+            'BACKEND': 'blog.cache_backends.TwoTierCache',
+            'LOCATION': 'file',
+            'OPTIONS': LOCAL_TIER_OPTIONS,
+        },
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость чтения двухуровневого кеша с locmem '
+        'и файловым кешем.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keys',
+            type=int,
+            default=1000,
+            help='Количество ключей в кеше.',
+        )
+        parser.add_argument(
+            '--reads',
+            type=int,
+            default=20000,
+            help='Количество чтений, большая часть - горячие ключи.',
+        )
+        parser.add_argument(
+            '--size',
+            type=int,
+            default=20000,
+            help='Размер значения в байтах.',
+        )
+
+    def bench(self, alias: str, keys: List[str], reads: List[str], value):
+        cache = caches[alias]
+        cache.clear()
+        started = time.perf_counter()
+        for key in keys:
+            cache.set(key, value, None)
+        writes_took = time.perf_counter() - started
+        started = time.perf_counter()
+        for key in reads:
+            cache.get(key)
+        reads_took = time.perf_counter() - started
+        cache.clear()
+        return len(keys) / writes_took, len(reads) / reads_took
+
+    def handle(self, *args, **options):
+        keys = [f'bench:{i}' for i in range(options['keys'])]
+        weights = [1 / (rank + 1) for rank in range(len(keys))]
+        reads = random.Random(0).choices(keys, weights, k=options['reads'])
+        value = 'x' * options['size']
+        with tempfile.TemporaryDirectory() as directory:
+            bench_caches = get_bench_caches(directory)
+            with override_settings(CACHES=bench_caches):
+                self.stdout.write(
+                    f'{"кеш":<18}{"запись, оп/с":>16}{"чтение, оп/с":>16}'
+                )
+                for alias in bench_caches:
+                    if alias == 'default':
+                        continue
+                    writes, reads_per_second = self.bench(
+                        alias, keys, reads, value
+                    )
+                    self.stdout.write(
+                        f'{alias:<18}{writes:>16.0f}'
+                        f'{reads_per_second:>16.0f}'
+                    )
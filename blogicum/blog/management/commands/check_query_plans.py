@@ -0,0 +1,69 @@
+import re
+from typing import Dict, List
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models.query import QuerySet
+
+from blog.models import Category, Comment
+from blog.services import get_posts, get_category_posts, get_profile_posts
+
+PAGE_SIZE = 10
+BAD_STEP = re.compile(
+    r'^SCAN (TABLE )?(blog_post|blog_comment)\b(?!.*\bUSING\b)'
+    r'|TEMP B-TREE'
+)
+
+
+def get_checked_queries() -> Dict[str, QuerySet]:
+    category = Category(pk=0)
+    return {
+        'index': get_posts()[:PAGE_SIZE],
+        'index (cursor)': get_posts().order_by('-pub_date', '-pk')[
+            :PAGE_SIZE + 1
+        ],
+        'category': get_category_posts(category)[:PAGE_SIZE],
+        'category (cursor)': get_category_posts(category).order_by(
+            '-pub_date', '-pk'
+        )[:PAGE_SIZE + 1],
+        'profile': get_profile_posts(False, 0)[:PAGE_SIZE],
+        'own profile': get_profile_posts(True, 0)[:PAGE_SIZE],
+        'own profile (cursor)': get_profile_posts(True, 0).order_by(
+            '-pub_date', '-pk'
+        )[:PAGE_SIZE + 1],
+        'post comments': Comment.objects.select_related('author').filter(
+            post_id=0
+        ),
+    }
+
+
+def explain(queryset: QuerySet) -> List[str]:
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}', params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+class Command(BaseCommand):
+    help = (
+        'Проверяет планы запросов лент публикаций: '
+        'без полного сканирования таблиц и сортировки во временном B-дереве.'
+    )
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError(
+                'EXPLAIN QUERY PLAN поддерживается только для SQLite.'
+            )
+        failures = []
+        for name, queryset in get_checked_queries().items():
+            plan = explain(queryset)
+            bad_steps = [step for step in plan if BAD_STEP.search(step)]
+            if bad_steps:
+                failures.append(f'{name}: {"; ".join(bad_steps)}')
+            self.stdout.write(f'{name}: {"; ".join(plan)}')
+        if failures:
+            raise CommandError(
+                'Запросы без подходящего индекса:\n' + '\n'.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('Все планы запросов в порядке.'))
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from blog.blobs import collect_garbage, rebuild_references
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет файлы изображений, на которые не ссылается ни одна '
+        'публикация.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--grace-hours',
+            type=float,
+            default=24,
+            help='Сколько часов файл должен быть не нужен перед удалением.',
+        )
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Сначала пересчитать ссылки на файлы по публикациям.',
+        )
+        parser.add_argument(
+            '--scan',
+            action='store_true',
+            help='Искать в хранилище и файлы без учётной записи.',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            referenced = rebuild_references()
+            self.stdout.write(f'Используемых файлов: {referenced}')
+        removed = collect_garbage(
+            timedelta(hours=options['grace_hours']), scan=options['scan']
+        )
+        for name in removed:
+            self.stdout.write(name)
+        self.stdout.write(
+            self.style.SUCCESS(f'Удалено файлов: {len(removed)}')
+        )
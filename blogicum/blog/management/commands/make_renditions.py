@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from blog.jobs import enqueue_renditions
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = (
+        'Ставит в очередь создание уменьшенных копий изображений '
+        'публикаций.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Пересоздать копии и у публикаций, где они уже есть.',
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only('image').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(renditions={})
+        queued = 0
+        for post in posts.iterator():
+            enqueue_renditions(post)
+            queued += 1
+        self.stdout.write(
+            self.style.SUCCESS(f'Поставлено в очередь публикаций: {queued}')
+        )
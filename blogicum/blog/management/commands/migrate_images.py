@@ -0,0 +1,75 @@
+from typing import Dict
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.blobs import get_post_files, rebuild_references
+from blog.cache import bump_versions
+from blog.models import ImageJob, Post
+from blog.services import get_post_feed_scopes
+from blog.storage import image_storage, is_hashed_name
+
+
+class Command(BaseCommand):
+    help = (
+        'Переносит изображения публикаций в хранилище с именами по '
+        'содержимому и пересчитывает ссылки на файлы.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--keep-originals',
+            action='store_true',
+            help='Не удалять файлы после переноса.',
+        )
+
+    def move(self, name: str) -> str:
+        if name not in self.moved:
+            with image_storage.open(name) as file:
+                self.moved[name] = image_storage.save(name, File(file))
+        return self.moved[name]
+
+    def handle(self, *args, **options):
+        self.moved: Dict[str, str] = {}
+        posts = (
+            Post.objects.select_related('author')
+            .exclude(image='')
+            .only('image', 'renditions', 'category_id', 'author__username')
+            .order_by('pk')
+        )
+        updated = missing = 0
+        for post in posts.iterator():
+            names = get_post_files(post.image.name, post.renditions)
+            if all(is_hashed_name(name) for name in names):
+                continue
+            try:
+                image = self.move(post.image.name)
+                renditions = {
+                    rendition: self.move(name)
+                    for rendition, name in post.renditions.items()
+                }
+            except FileNotFoundError as error:
+                missing += 1
+                self.stderr.write(f'{post.image.name}: {error}')
+                continue
+            Post.objects.filter(pk=post.pk).update(
+                image=image, renditions=renditions, updated_at=timezone.now()
+            )
+            ImageJob.objects.filter(post=post, image=post.image.name).update(
+                image=image
+            )
+            bump_versions(get_post_feed_scopes(post))
+            updated += 1
+        referenced = rebuild_references()
+        if not options['keep_originals']:
+            for name, new_name in self.moved.items():
+                if name != new_name:
+                    image_storage.delete(name)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Перенесено публикаций: {updated}, файлов: '
+                f'{len(self.moved)}, без файла: {missing}; '
+                f'используемых файлов: {referenced}'
+            )
+        )
@@ -0,0 +1,127 @@
+import os
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from django.core.management.base import BaseCommand
+
+from blog.images import render_renditions
+from blog.jobs import (
+    claim_jobs,
+    fail_job,
+    finish_job,
+    is_outdated,
+    release_stuck_jobs,
+)
+
+
+def run_inline(name: str) -> Future:
+    future = Future()
+    try:
+        future.set_result(render_renditions(name))
+    except Exception as error:
+        future.set_exception(error)
+    return future
+
+
+class Command(BaseCommand):
+    help = (
+        'Обрабатывает очередь изображений публикаций: создаёт их '
+        'уменьшенные копии в пуле процессов.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=os.cpu_count() or 1,
+            help=(
+                'Количество процессов; 0 - обрабатывать в текущем '
+                'процессе.'
+            ),
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Обработать очередь и завершиться.',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=2.0,
+            help='Секунды между проверками пустой очереди.',
+        )
+
+    def submit(self, image: str) -> Future:
+        if self.pool is None:
+            return run_inline(image)
+        try:
+            return self.pool.submit(render_renditions, image)
+        except BrokenProcessPool:
+            # A worker died after the previous batch was collected.
+            self.restart_pool()
+            return self.pool.submit(render_renditions, image)
+
+    def restart_pool(self) -> None:
+        self.stderr.write('Пул процессов сломан, запускается новый.')
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.pool = ProcessPoolExecutor(self.workers)
+
+    def process_batch(self) -> int:
+        jobs = claim_jobs(max(1, self.workers) * 2)
+        rendering = {}
+        for job in jobs:
+            if is_outdated(job):
+                finish_job(job, {})
+            else:
+                rendering[job] = self.submit(job.image)
+        broken = False
+        for job, future in rendering.items():
+            try:
+                renditions = future.result()
+            except Exception as error:
+                # A crashed worker breaks the pool and fails all the
+                # unfinished jobs of the batch; they go back to the queue,
+                # and an image that keeps crashing fails after MAX_ATTEMPTS.
+                broken = broken or isinstance(error, BrokenProcessPool)
+                fail_job(job, repr(error))
+                self.stderr.write(f'{job.image}: {error!r}')
+            else:
+                finish_job(job, renditions)
+                self.stdout.write(f'{job.image}: готово')
+        if broken:
+            self.restart_pool()
+        return len(jobs)
+
+    def release_stuck(self) -> int:
+        released = release_stuck_jobs()
+        if released:
+            self.stdout.write(f'Возвращено в очередь зависших: {released}')
+        return released
+
+    def handle(self, *args, **options):
+        self.workers = options['workers']
+        self.pool = (
+            ProcessPoolExecutor(self.workers) if self.workers else None
+        )
+        processed = 0
+        try:
+            while True:
+                # Jobs of workers that died while this one keeps running
+                # are picked up on the next poll.
+                released = self.release_stuck()
+                batch = self.process_batch()
+                processed += batch
+                if batch or released:
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if self.pool is not None:
+                self.pool.shutdown(cancel_futures=True)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обработано изображений: {processed}')
+        )
@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from blog.cache_backends import is_process_local
+from blog.warmup import get_warm_urls, warm
+
+
+class Command(BaseCommand):
+    help = (
+        'Заранее отрисовывает первые страницы лент и популярные '
+        'публикации в кеш страниц.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=settings.BLOG_WARM_PAGES,
+            help='Количество первых страниц каждой ленты.',
+        )
+        parser.add_argument(
+            '--categories',
+            type=int,
+            default=settings.BLOG_WARM_CATEGORIES,
+            help='Количество самых больших категорий.',
+        )
+        parser.add_argument(
+            '--posts',
+            type=int,
+            default=settings.BLOG_WARM_POSTS,
+            help='Количество самых обсуждаемых публикаций.',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=settings.BLOG_WARM_CONCURRENCY,
+            help='Количество страниц, отрисовываемых одновременно.',
+        )
+        parser.add_argument(
+            '--time-limit',
+            type=float,
+            default=settings.BLOG_WARM_TIME_LIMIT,
+            help='Секунды, после которых новые страницы не отрисовываются.',
+        )
+        parser.add_argument(
+            '--process-local',
+            action='store_true',
+            help=(
+                'Прогреть кеш, хранящийся в памяти процесса, '
+                'когда команда вызывается из него самого.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        if not settings.BLOG_PAGE_CACHE_TIMEOUT:
+            raise CommandError('Кеш страниц отключён.')
+        local = is_process_local(caches['default'])
+        if local and not options['process_local']:
+            raise CommandError(
+                'Кеш хранится в памяти процесса и не виден веб-серверу: '
+                'задайте общий кеш в CACHE_URL.'
+            )
+        urls = get_warm_urls(
+            options['pages'], options['categories'], options['posts']
+        )
+        results = warm(urls, options['concurrency'], options['time_limit'])
+        warmed = failed = skipped = 0
+        for url, result in zip(urls, results):
+            if result is None:
+                skipped += 1
+                self.stdout.write(f'{url}: пропущено по времени')
+            elif result.error:
+                failed += 1
+                self.stdout.write(self.style.ERROR(f'{url}: {result.error}'))
+            else:
+                warmed += 1
+                self.stdout.write(
+                    f'{url}: {result.status}, {result.seconds * 1000:.0f} мс'
+                )
+        style = self.style.SUCCESS if not failed else self.style.WARNING
+        self.stdout.write(
+            style(
+                f'Прогрето страниц: {warmed}, ошибок: {failed}, '
+                f'пропущено: {skipped}'
+            )
+        )
@@ -0,0 +1,66 @@
+import logging
+import re
+from collections import Counter
+from contextlib import ExitStack
+from typing import Callable, List
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse
+
+logger = logging.getLogger('blog.query_budget')
+
+PARAM_LIST = re.compile(r'\((?:%s, )*%s\)')
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def get_fingerprint(sql: str) -> str:
+    return PARAM_LIST.sub('(...)', sql)
+
+
+class QueryBudgetMiddleware:
+    """Checks the number of SQL queries per view against QUERY_BUDGETS.
+
+    Budgets are declared per URL name in settings. Violations are logged
+    with the fingerprints of the queries that were run, or raised as
+    QueryBudgetExceeded when QUERY_BUDGET_RAISE is set (as in tests).
+    """
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponse]):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest) -> HttpResponse:
+        queries: List[str] = []
+
+        def record(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(record))
+            response = self.get_response(request)
+
+        if request.resolver_match is None:
+            return response
+        url_name = request.resolver_match.view_name
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        if budget is None or len(queries) <= budget:
+            return response
+
+        fingerprints = Counter(get_fingerprint(sql) for sql in queries)
+        message = (
+            f'{request.method} {request.path} ({url_name}): '
+            f'{len(queries)} SQL queries, budget is {budget}.\n'
+            + '\n'.join(
+                f'{count} x {sql}'
+                for sql, count in fingerprints.most_common()
+            )
+        )
+        if settings.QUERY_BUDGET_RAISE:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
+        return response
@@ -0,0 +1,42 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:26
+
+from django.db import migrations, models
+from django.utils.text import Truncator
+
+# A frozen copy of blog.models.make_excerpt as of this migration.
+EXCERPT_WORDS = 10
+EXCERPT_MAX_LENGTH = 512
+
+
+def make_excerpt(text):
+    return Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(EXCERPT_MAX_LENGTH)
+
+
+def fill_excerpts(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    posts = Post.objects.only('pk', 'text')
+    for post in posts.iterator():
+        post.excerpt = make_excerpt(post.text)
+        post.save(update_fields=['excerpt'])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('blog', '0003_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='excerpt',
+            field=models.CharField(
+                blank=True,
+                editable=False,
+                max_length=512,
+                verbose_name='Начало текста',
+            ),
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:55
+
+import blog.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('blog', '0007_image_jobs'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageBlob',
+            fields=[
+                (
+                    'id',
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name='ID',
+                    ),
+                ),
+                (
+                    'name',
+                    models.CharField(
+                        max_length=255, unique=True, verbose_name='Файл'
+                    ),
+                ),
+                (
+                    'references',
+                    models.PositiveIntegerField(
+                        default=0, verbose_name='Количество ссылок'
+                    ),
+                ),
+                (
+                    'updated_at',
+                    models.DateTimeField(
+                        auto_now=True, verbose_name='Изменено'
+                    ),
+                ),
+            ],
+            options={
+                'verbose_name': 'файл изображения',
+                'verbose_name_plural': 'Файлы изображений',
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(
+                blank=True,
+                storage=blog.storage.ContentAddressedStorage(),
+                upload_to='post_images',
+                verbose_name='Изображение',
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.16 on 2026-10-18 03:17
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('blog', '0008_image_blobs'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='imagejob',
+            options={
+                'ordering': ('created_at',),
+                'verbose_name': 'Обработка изображения',
+                'verbose_name_plural': 'Обработка изображений',
+            },
+        ),
+    ]
@@ -0,0 +1,190 @@
+from http import HTTPStatus
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.db.models import BooleanField, ExpressionWrapper, Model, Q
+from django.db.models.query import QuerySet
+from django.http import HttpRequest, HttpResponse, Http404
+from django.shortcuts import redirect
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from blog.cache import (
+    TAXONOMY_SCOPE,
+    fill_holes,
+    get_or_refill,
+    get_versions,
+    make_etag,
+    make_stamped_key,
+)
+from blog.services import expire_scheduled
+
+
+class OnlyAuthorMixin:
+    """Loads the edited object once and lets only its author through.
+
+    Ownership is computed by the same query that fetches the object, so a
+    missing object is a 404 and somebody else's one redirects back to the
+    post without a second round-trip.
+    """
+
+    def get_owned_object(self) -> Model:
+        queryset = self.get_queryset().annotate(
+            is_owner=ExpressionWrapper(
+                Q(author=self.request.user), output_field=BooleanField()
+            )
+        )
+        try:
+            return queryset.get(pk=self.kwargs[self.pk_url_kwarg])
+        except queryset.model.DoesNotExist:
+            raise Http404('Страницы не существует')
+
+    def dispatch(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        self.object = self.get_owned_object()
+        if not self.object.is_owner:
+            return redirect('blog:post_detail', pk=self.kwargs['pk'])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset: Optional[QuerySet] = None) -> Model:
+        return self.object
+
+
+class CacheScopesMixin:
+    def get_cache_scopes(self) -> List[str]:
+        raise NotImplementedError
+
+    def get_cache_ttl(self) -> Optional[int]:
+        """Seconds until a scheduled post changes the page, if any.
+
+        Called before the versions of the scopes are read: scopes whose
+        scheduled posts are due get bumped.
+        """
+        if not hasattr(self, '_cache_ttl'):
+            self._cache_ttl = expire_scheduled(self.get_cache_scopes())
+        return self._cache_ttl
+
+
+class ConditionalGetMixin(CacheScopesMixin):
+    """Answers GET with 304 when the page has not changed.
+
+    The ETag comes from the version stamps of the page scopes, which are
+    bumped on every change that can affect the page, so checking it costs
+    a cache lookup and no SQL or rendering. There is no Last-Modified:
+    its one second resolution would hide changes made within the second
+    of an earlier response. A stale page served while it is being
+    refilled gets no validator.
+    """
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any):
+        self.get_cache_ttl()
+        versions = get_versions([*self.get_cache_scopes(), TAXONOMY_SCOPE])
+        etag = make_etag(request, versions)
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        if response.status_code in (HTTPStatus.OK, HTTPStatus.NOT_MODIFIED):
+            if not getattr(response, 'stale', False):
+                response['ETag'] = etag
+            if request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, no_cache=True)
+        return response
+
+
+class PageCacheMixin(CacheScopesMixin):
+    """Serves rendered pages from a cache shared by all visitors.
+
+    The page is cached with holes in place of the per-user fragments (the
+    header and the comment form), which are rendered for every request;
+    anonymous visitors get a copy with the holes already filled. Pages
+    personal to the visitor - their own profile, a post they wrote or
+    commented on - are rendered as usual.
+
+    The cache key carries the version stamps of the page scopes, so a
+    change to a post, comment, category or location only retires the
+    pages of the scopes it touches. A page expires no later than the next
+    scheduled post of its scopes is published.
+    """
+
+    page_holes = False
+
+    def is_personal_page(self) -> bool:
+        return False
+
+    def get_page_participants(self) -> Set[int]:
+        return set()
+
+    def get_hole_context(self) -> Dict[str, Any]:
+        return {}
+
+    def get_page_cache_key(self) -> Tuple[str, str]:
+        return make_stamped_key(
+            'page',
+            [*self.get_cache_scopes(), TAXONOMY_SCOPE],
+            self.request.get_full_path(),
+        )
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        self.participants = self.get_page_participants()
+        if self.request.user.pk in self.participants:
+            self.page_holes = False
+        context['page_holes'] = self.page_holes
+        return context
+
+    def render_page(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> Optional[Dict[str, Any]]:
+        """Renders the page for the shared cache.
+
+        Returns None when the page can't be shared; the response rendered
+        for the visitor is kept in ``rendered_response`` either way.
+        """
+        self.page_holes = True
+        response = super().get(request, *args, **kwargs)
+        self.rendered_response = response
+        if response.status_code != HTTPStatus.OK:
+            return None
+        response.render()
+        if not self.page_holes:
+            return None
+        content = response.content.decode()
+        return {
+            'content': content,
+            'anonymous': fill_holes(
+                content, self.get_hole_context(), request, AnonymousUser()
+            ),
+            'participants': self.participants,
+        }
+
+    def get(self, request: HttpRequest, *args: Any, **kwargs: Any):
+        timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+        if not timeout or self.is_personal_page():
+            return super().get(request, *args, **kwargs)
+        ttl = self.get_cache_ttl()
+        if ttl is not None:
+            timeout = min(timeout, ttl)
+        key, stamp = self.get_page_cache_key()
+        self.rendered_response = None
+        page, fresh = get_or_refill(
+            key,
+            stamp,
+            lambda: self.render_page(request, *args, **kwargs),
+            timeout,
+        )
+        if page is None or request.user.pk in page['participants']:
+            if self.rendered_response is not None:
+                return self.rendered_response
+            self.page_holes = False
+            return super().get(request, *args, **kwargs)
+        if request.user.is_authenticated:
+            response = HttpResponse(
+                fill_holes(page['content'], self.get_hole_context(), request)
+            )
+        else:
+            response = HttpResponse(page['anonymous'])
+        response.stale = not fresh
+        return response
@@ -1,11 +1,24 @@
 from django.db import models
+from django.db.models import DEFERRED
 from django.contrib.auth import get_user_model
+from django.dispatch import Signal
 from django.urls import reverse
+from django.utils.text import Truncator
 
+from blog.storage import image_storage
 from core.models import IsPublishedCreatedAtModel
 
 User = get_user_model()
 
+EXCERPT_WORDS: int = 10
+EXCERPT_MAX_LENGTH: int = 512
+
+
+def make_excerpt(text: str) -> str:
+    return Truncator(
+        Truncator(text).words(EXCERPT_WORDS, truncate=' …')
+    ).chars(EXCERPT_MAX_LENGTH)
+
 
 class Location(IsPublishedCreatedAtModel):
     name = models.CharField(
@@ -56,6 +69,12 @@ class Post(IsPublishedCreatedAtModel):
     text = models.TextField(
         verbose_name='Текст',
     )
+    excerpt = models.CharField(
+        verbose_name='Начало текста',
+        max_length=EXCERPT_MAX_LENGTH,
+        blank=True,
+        editable=False,
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         editable=True,
@@ -88,7 +107,29 @@ class Post(IsPublishedCreatedAtModel):
     image = models.ImageField(
         'Изображение',
         upload_to='post_images',
+        storage=image_storage,
+        blank=True,
+    )
+    renditions = models.JSONField(
+        verbose_name='Уменьшенные копии изображения',
+        default=dict,
+        blank=True,
+        editable=False,
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    last_comment_at = models.DateTimeField(
+        verbose_name='Последний комментарий',
+        null=True,
         blank=True,
+        editable=False,
+    )
+    updated_at = models.DateTimeField(
+        verbose_name='Изменено',
+        auto_now=True,
     )
 
     class Meta:
@@ -97,14 +138,91 @@ class Post(IsPublishedCreatedAtModel):
         ordering = [
             '-pub_date',
         ]
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                condition=models.Q(is_published=True),
+                name='post_published_feed_idx',
+            ),
+            models.Index(
+                fields=['category', '-pub_date', '-id'],
+                condition=models.Q(is_published=True),
+                name='post_category_feed_idx',
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx',
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.loaded_category_id = instance.__dict__.get('category_id')
+        instance.loaded_text = instance.__dict__.get('text', DEFERRED)
+        instance.loaded_image = instance.__dict__.get('image')
+        instance.loaded_renditions = instance.__dict__.get('renditions')
+        return instance
+
+    @property
+    def image_changed(self) -> bool:
+        return (self.image.name or '') != (
+            getattr(self, 'loaded_image', None) or ''
+        )
+
+    def is_excerpt_outdated(self, update_fields) -> bool:
+        """Whether the text is loaded and being saved with a change.
+
+        A deferred text is never loaded just to rebuild the excerpt.
+        """
+        if 'text' not in self.__dict__:
+            return False
+        if update_fields is not None:
+            return 'text' in update_fields
+        return self.text != getattr(self, 'loaded_text', DEFERRED)
+
+    def save(self, *args, **kwargs):
+        if self.image and not self.image._committed:
+            # Stored ahead of the row: the content-addressed name of the
+            # file tells whether the image really changed.
+            self.image.save(self.image.name, self.image.file, save=False)
+        update_fields = kwargs.get('update_fields')
+        if self.is_excerpt_outdated(update_fields):
+            self.excerpt = make_excerpt(self.text)
+            self.loaded_text = self.text
+            if update_fields is not None:
+                update_fields = kwargs['update_fields'] = {
+                    *update_fields,
+                    'excerpt',
+                }
+        if self.image_changed:
+            self.renditions = {}
+            if update_fields is not None and 'image' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'renditions'}
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'pk': self.pk})
 
 
+# Sent with ``post_ids`` after comments of these posts are deleted. Comment
+# has no pre/post_delete receivers, so the comments of a deleted post are
+# still removed by one fast DELETE instead of being loaded and signalled
+# one by one.
+comments_deleted = Signal()
+
+
+class CommentQuerySet(models.QuerySet):
+    def delete(self):
+        post_ids = set(self.values_list('post_id', flat=True))
+        deleted = super().delete()
+        comments_deleted.send(sender=Comment, post_ids=post_ids)
+        return deleted
+
+
 class Comment(models.Model):
     text = models.TextField(
         'Текст',
@@ -123,10 +241,108 @@ class Comment(models.Model):
         related_name='comments',
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'комментарии'
         ordering = ('created_at',)
+        indexes = [
+            models.Index(
+                fields=['post', 'created_at'],
+                name='comment_post_created_idx',
+            ),
+        ]
 
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'pk': self.kwargs['pk']})
+
+    def delete(self, *args, **kwargs):
+        deleted = super().delete(*args, **kwargs)
+        comments_deleted.send(sender=Comment, post_ids={self.post_id})
+        return deleted
+
+
+class ImageJob(models.Model):
+    """Rendering of the resized copies of a post image, queued for the
+    process_images worker."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Обрабатывается'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+
+    post = models.ForeignKey(
+        Post,
+        verbose_name='Публикация',
+        on_delete=models.CASCADE,
+        related_name='image_jobs',
+    )
+    image = models.CharField(
+        'Изображение',
+        max_length=255,
+    )
+    status = models.CharField(
+        'Статус',
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        'Попытки',
+        default=0,
+    )
+    error = models.TextField(
+        'Ошибка',
+        blank=True,
+    )
+    created_at = models.DateTimeField(
+        'Добавлено',
+        auto_now_add=True,
+    )
+    started_at = models.DateTimeField(
+        'Начато',
+        null=True,
+        blank=True,
+    )
+
+    class Meta:
+        verbose_name = 'Обработка изображения'
+        verbose_name_plural = 'Обработка изображений'
+        ordering = ('created_at',)
+        indexes = [
+            models.Index(
+                fields=['status', 'created_at'],
+                name='imagejob_queue_idx',
+            ),
+        ]
+
+    def __str__(self) -> str:
+        return self.image
+
+
+class ImageBlob(models.Model):
+    """A file of the image storage and the number of references to it
+    from post images and their renditions."""
+
+    name = models.CharField(
+        'Файл',
+        max_length=255,
+        unique=True,
+    )
+    references = models.PositiveIntegerField(
+        'Количество ссылок',
+        default=0,
+    )
+    updated_at = models.DateTimeField(
+        'Изменено',
+        auto_now=True,
+    )
+
+    class Meta:
+        verbose_name = 'файл изображения'
+        verbose_name_plural = 'Файлы изображений'
+
+    def __str__(self) -> str:
+        return self.name
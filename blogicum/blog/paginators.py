@@ -0,0 +1,235 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.core.paginator import (
+    EmptyPage,
+    InvalidPage,
+    Page,
+    PageNotAnInteger,
+    Paginator,
+)
+from django.db import connections
+from django.db.models import Model, Q
+from django.db.models.query import QuerySet
+from django.utils.functional import cached_property
+
+from blog.cache import TAXONOMY_SCOPE, get_or_refill, make_stamped_key
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(
+    direction: str, position: Optional[Tuple[datetime, int]] = None
+) -> str:
+    raw = direction
+    if position is not None:
+        raw = f'{direction}|{position[0].isoformat()}|{position[1]}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[str, Optional[Tuple[datetime, int]]]:
+    try:
+        raw = base64.urlsafe_b64decode(
+            cursor + '=' * (-len(cursor) % 4)
+        ).decode()
+        direction, *position = raw.split('|')
+        if direction not in (NEXT, PREVIOUS):
+            raise ValueError(direction)
+        if not position:
+            return direction, None
+        value, pk = position
+        return direction, (datetime.fromisoformat(value), int(pk))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidPage('Неверный курсор страницы')
+
+
+class CursorPage:
+    is_cursor = True
+
+    def __init__(
+        self,
+        object_list: List[Model],
+        next_cursor: Optional[str],
+        previous_cursor: Optional[str],
+    ):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __repr__(self) -> str:
+        return f'<Cursor page of {len(self.object_list)} objects>'
+
+    def __len__(self) -> int:
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index: Any) -> Any:
+        return self.object_list[index]
+
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    def has_previous(self) -> bool:
+        return self.previous_cursor is not None
+
+    def has_other_pages(self) -> bool:
+        return self.has_next() or self.has_previous()
+
+    @property
+    def last_cursor(self) -> str:
+        return encode_cursor(PREVIOUS)
+
+
+class CursorPaginator:
+    """Keyset pagination over ``(field, pk)``, newest first.
+
+    Every page is a range scan from the cursor position, so it costs the
+    same no matter how deep it is, and no total count is needed.
+    """
+
+    def __init__(
+        self, queryset: QuerySet, per_page: int, field: str = 'pub_date'
+    ):
+        self.queryset = queryset
+        self.per_page = per_page
+        self.field = field
+
+    def _position(self, obj: Model) -> Tuple[datetime, int]:
+        return getattr(obj, self.field), obj.pk
+
+    def page(self, cursor: Optional[str]) -> CursorPage:
+        direction, position = (
+            decode_cursor(cursor) if cursor else (NEXT, None)
+        )
+        queryset = self.queryset
+        if direction == NEXT:
+            queryset = queryset.order_by(f'-{self.field}', '-pk')
+            if position is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__lt': position[0]})
+                    | Q(**{self.field: position[0], 'pk__lt': position[1]})
+                )
+        else:
+            queryset = queryset.order_by(self.field, 'pk')
+            if position is not None:
+                queryset = queryset.filter(
+                    Q(**{f'{self.field}__gt': position[0]})
+                    | Q(**{self.field: position[0], 'pk__gt': position[1]})
+                )
+        objects = list(queryset[:self.per_page + 1])
+        has_more = len(objects) > self.per_page
+        objects = objects[:self.per_page]
+        if direction == PREVIOUS:
+            objects.reverse()
+        if not objects:
+            return CursorPage(objects, None, None)
+
+        first, last = objects[0], objects[-1]
+        if direction == NEXT:
+            has_next, has_previous = has_more, position is not None
+        else:
+            has_next, has_previous = position is not None, has_more
+        return CursorPage(
+            objects,
+            encode_cursor(NEXT, self._position(last)) if has_next else None,
+            (
+                encode_cursor(PREVIOUS, self._position(first))
+                if has_previous
+                else None
+            ),
+        )
+
+
+def estimate_count(queryset: QuerySet) -> Optional[int]:
+    """Number of rows the query planner expects, where it tells one."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        (plan,) = cursor.fetchone()
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class FeedPaginator(Paginator):
+    """Paginator of a feed whose count is cached until the feed changes.
+
+    The count is stored under the version stamps of the feed scopes. Feeds
+    longer than BLOG_EXACT_COUNT_LIMIT are counted by the query planner's
+    estimate where the database has one; pages past an underestimated end
+    are then still served until they come out empty.
+    """
+
+    def __init__(
+        self,
+        object_list: QuerySet,
+        per_page: int,
+        scopes: Iterable[str],
+        *parts: str,
+        **kwargs: Any,
+    ):
+        super().__init__(object_list, per_page, **kwargs)
+        self.scopes = list(scopes)
+        self.parts = parts
+
+    def _count(self) -> Tuple[int, bool]:
+        limit = settings.BLOG_EXACT_COUNT_LIMIT
+        queryset = self.object_list.order_by()
+        # The planner's estimate is cheap to get, and without one a bounded
+        # count would only be followed by the full one.
+        estimate = estimate_count(queryset)
+        if estimate is None:
+            return queryset.count(), False
+        count = queryset[:limit + 1].count()
+        if count <= limit:
+            return count, False
+        return max(estimate, count), True
+
+    @cached_property
+    def _counted(self) -> Tuple[int, bool]:
+        timeout = settings.BLOG_PAGE_CACHE_TIMEOUT
+        if not timeout:
+            return self._count()
+        # Feeds hide posts of unpublished categories, so the count also
+        # depends on the taxonomy, like the pages themselves.
+        key, stamp = make_stamped_key(
+            'count', [*self.scopes, TAXONOMY_SCOPE], *self.parts
+        )
+        counted, _ = get_or_refill(key, stamp, self._count, timeout)
+        return counted
+
+    @property
+    def count(self) -> int:
+        return self._counted[0]
+
+    @property
+    def is_estimated(self) -> bool:
+        return self._counted[1]
+
+    def validate_number(self, number: Any) -> int:
+        if not self.is_estimated:
+            return super().validate_number(number)
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы должен быть целым числом')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number: Any) -> Page:
+        if not self.is_estimated:
+            return super().page(number)
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        object_list = list(self.object_list[bottom:bottom + self.per_page])
+        if not object_list and number > 1:
+            raise EmptyPage('Страница не содержит публикаций')
+        return self._get_page(object_list, number, self)
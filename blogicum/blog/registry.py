@@ -0,0 +1,113 @@
+import threading
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional
+
+from django.core.cache import cache
+from django.db import transaction
+
+from blog.models import Category, Location, Post
+
+VERSION_KEY = 'blog:registry:version'
+CHECK_INTERVAL: float = 5.0
+
+
+def new_version() -> str:
+    return uuid.uuid4().hex
+
+
+class Registry:
+    """Process-local copy of the categories and locations tables.
+
+    Both tables are tiny and rarely change, so every worker keeps them in
+    memory. A change bumps a version stamp in the shared cache: the worker
+    that made it reloads right away, the others within CHECK_INTERVAL.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self._checked_at = 0.0
+        self.categories: Dict[int, Category] = {}
+        self.categories_by_slug: Dict[str, Category] = {}
+        self.locations: Dict[int, Location] = {}
+
+    def _load(self, version: str) -> None:
+        categories = {
+            category.pk: category for category in Category.objects.all()
+        }
+        self.categories = categories
+        self.categories_by_slug = {
+            category.slug: category for category in categories.values()
+        }
+        self.locations = {
+            location.pk: location for location in Location.objects.all()
+        }
+        self._version = version
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if self._version is not None and (
+            now - self._checked_at < CHECK_INTERVAL
+        ):
+            return
+        with self._lock:
+            version = cache.get_or_set(VERSION_KEY, new_version, None)
+            if version != self._version:
+                self._load(version)
+            self._checked_at = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._version = None
+
+    def invalidate(self) -> None:
+        """Makes every worker reload, now and again after the transaction
+        commits: a worker reloading in between still saw the old rows."""
+
+        def bump():
+            cache.set(VERSION_KEY, new_version(), None)
+            self.clear()
+
+        bump()
+        transaction.on_commit(bump)
+
+    def get_published_category(self, slug: str) -> Optional[Category]:
+        self._refresh()
+        category = self.categories_by_slug.get(slug)
+        if category is None or not category.is_published:
+            return None
+        return category
+
+    def get_unpublished_category_ids(self) -> List[int]:
+        self._refresh()
+        return [
+            pk
+            for pk, category in self.categories.items()
+            if not category.is_published
+        ]
+
+    def get_category(self, pk: Optional[int]) -> Optional[Category]:
+        self._refresh()
+        return self.categories.get(pk)
+
+    def get_location(self, pk: Optional[int]) -> Optional[Location]:
+        self._refresh()
+        return self.locations.get(pk)
+
+    def attach(self, posts: Iterable[Post]) -> List[Post]:
+        """Sets category and location of the posts from memory, so feed
+        querysets don't have to join them."""
+        self._refresh()
+        posts = list(posts)
+        for post in posts:
+            Post.category.field.set_cached_value(
+                post, self.categories.get(post.category_id)
+            )
+            Post.location.field.set_cached_value(
+                post, self.locations.get(post.location_id)
+            )
+        return posts
+
+
+registry = Registry()
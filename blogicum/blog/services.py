@@ -1,76 +1,277 @@
+import math
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.db.models.query import QuerySet
 from django.utils import timezone
 from django.db import models
-from django.shortcuts import redirect
-from django.core.exceptions import ObjectDoesNotExist
-from django.http import Http404
+from django.db.models import (
+    Count,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Prefetch,
+    Q,
+    Subquery,
+)
+from django.db.models.functions import Coalesce
 
-from blog.models import Post
+from blog.cache import (
+    INDEX_SCOPE,
+    bump_versions,
+    category_scope,
+    get_versions,
+    post_scope,
+    profile_scope,
+)
+from blog.models import Category, Post, Comment, User
+from blog.registry import registry
 
 
-def get_posts() -> QuerySet:
-    return Post.objects.select_related(
-        'location',
-        'category',
-    ).filter(
-        is_published=True,
-        pub_date__lte=timezone.now(),
-        category__is_published=True,
+def get_published_posts() -> QuerySet:
+    return (
+        Post.objects.select_related('author')
+        .defer('text')
+        .filter(
+            is_published=True,
+            pub_date__lte=timezone.now(),
+        )
     )
 
 
-def get_category_posts(slug: str) -> QuerySet:
-    return get_posts().filter(category__slug=slug, category__is_published=True)
+def in_published_categories(posts: QuerySet) -> QuerySet:
+    """Filters posts by the category ids from the registry, without
+    joining the categories.
 
+    Unpublished categories are few, and ``NOT IN`` keeps the feed indexes
+    ordered by the date usable.
+    """
+    return posts.filter(category_id__isnull=False).exclude(
+        category_id__in=registry.get_unpublished_category_ids()
+    )
+
+
+def get_posts() -> QuerySet:
+    return in_published_categories(get_published_posts())
 
-def get_profile_posts(for_user: bool, username: str) -> QuerySet:
+
+def get_category_posts(category: Category) -> QuerySet:
+    return get_published_posts().filter(category_id=category.pk)
+
+
+def get_profile_posts(for_user: bool, author_id: int) -> QuerySet:
+    """Posts of the author, without the author joined: the profile page
+    already has it."""
     if for_user:
-        posts = Post.objects.select_related('author').filter(
-            author__username=username
-        )
+        posts = Post.objects.defer('text').filter(author_id=author_id)
     else:
-        posts = (
-            get_posts()
-            .select_related('author')
-            .filter(author__username=username)
-        )
+        posts = get_posts().select_related(None).filter(author_id=author_id)
     return posts
 
 
-def get_object(
-    model: type[models.Model], pk: int, related: tuple[str]
-) -> type[models.Model]:
-    return model.objects.select_related(*related).get(pk=pk)
-
-
-def get_author(model: type[models.Model], pk: int) -> str:
-    author = model.objects.select_related('author').get(id=pk).author.username
-    return author
-
-
-def validate_user(func):
-    def wrapper(
-        self,
-        request,
-        *args,
-        **kwargs,
-    ):
-        try:
-            if 'comment_id' in self.kwargs:
-                if self.request.user.username == get_author(
-                    model=self.model,
-                    pk=self.kwargs['comment_id'],
-                ):
-                    return func(self, request, *args, **kwargs)
-                return redirect('blog:post_detail', pk=self.kwargs['pk'])
-            else:
-                if self.request.user.username == get_author(
-                    model=self.model,
-                    pk=self.kwargs['pk'],
-                ):
-                    return func(self, request, *args, **kwargs)
-                return redirect('blog:post_detail', pk=self.kwargs['pk'])
-        except ObjectDoesNotExist:
-            raise Http404('Страницы не существует')
-
-    return wrapper
+# Fields of a user shown on the profile page, the only ones cached: the
+# password hash, email and permissions never leave the database.
+PROFILE_FIELDS = (
+    'id',
+    'username',
+    'first_name',
+    'last_name',
+    'date_joined',
+    'is_staff',
+)
+
+
+def _user_key(username: str) -> str:
+    return f'blog:user:{username}'
+
+
+def get_user_by_username(username: str) -> Optional[User]:
+    """The user with the username, cached until the user is changed.
+
+    Only PROFILE_FIELDS are loaded, the others are deferred.
+    """
+    key = _user_key(username)
+    cached = cache.get(key)
+    if cached is None or 'fields' not in cached:
+        cached = {
+            'fields': User.objects.filter(username=username)
+            .values(*PROFILE_FIELDS)
+            .first()
+        }
+        cache.set(key, cached, settings.BLOG_PAGE_CACHE_TIMEOUT)
+    fields = cached['fields']
+    if fields is None:
+        return None
+    return User.from_db(None, list(fields), list(fields.values()))
+
+
+def forget_users(usernames: Iterable[str]) -> None:
+    keys = [_user_key(username) for username in set(usernames)]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def add_comment_to_counters(comment: Comment) -> None:
+    Post.objects.filter(pk=comment.post_id).update(
+        comment_count=F('comment_count') + 1,
+        last_comment_at=comment.created_at,
+    )
+
+
+def refresh_comment_counters(post_ids: Iterable[int]) -> int:
+    comments = Comment.objects.filter(post=OuterRef('pk')).order_by()
+    return Post.objects.filter(pk__in=post_ids).update(
+        comment_count=Coalesce(
+            Subquery(
+                comments.values('post')
+                .annotate(total=Count('pk'))
+                .values('total')
+            ),
+            0,
+        ),
+        last_comment_at=Subquery(
+            comments.values('post')
+            .annotate(last=Max('created_at'))
+            .values('last')
+        ),
+    )
+
+
+def get_visible_posts(user: models.Model) -> QuerySet:
+    visible = Q(is_published=True, pub_date__lte=timezone.now())
+    if user.is_authenticated:
+        visible |= Q(author=user)
+    return (
+        Post.objects.select_related(
+            'author',
+            'location',
+            'category',
+        )
+        .prefetch_related(
+            Prefetch(
+                'comments',
+                queryset=Comment.objects.select_related('author'),
+            )
+        )
+        .filter(visible)
+    )
+
+
+def get_feed_scopes(
+    category_ids: Iterable[Optional[int]], username: str
+) -> List[str]:
+    scopes = [INDEX_SCOPE, profile_scope(username)]
+    for category_id in set(category_ids):
+        category = registry.get_category(category_id)
+        if category is not None:
+            scopes.append(category_scope(category.slug))
+    return scopes
+
+
+def get_post_feed_scopes(post: Post) -> List[str]:
+    return [
+        post_scope(post.pk),
+        *get_feed_scopes(
+            (post.category_id, getattr(post, 'loaded_category_id', None)),
+            post.author.username,
+        ),
+    ]
+
+
+def get_comment_feed_scopes(post_ids: Iterable[int]) -> List[str]:
+    """Scopes of the pages that show comments of the posts."""
+    return _get_feed_scopes_of(Post.objects.filter(pk__in=post_ids))
+
+
+def get_user_feed_scopes(user: User) -> List[str]:
+    """Scopes of the pages that show the user's name: those of the user's
+    posts and of the posts the user commented on."""
+    return _get_feed_scopes_of(
+        Post.objects.filter(
+            Q(author=user)
+            | Q(pk__in=Comment.objects.filter(author=user).values('post_id'))
+        )
+    )
+
+
+def _get_feed_scopes_of(posts: QuerySet) -> List[str]:
+    posts = posts.values('pk', 'category_id', 'author__username')
+    scopes = []
+    for post in posts:
+        scopes += [
+            post_scope(post['pk']),
+            *get_feed_scopes([post['category_id']], post['author__username']),
+        ]
+    return scopes
+
+
+def get_scheduled_posts(scope: str) -> QuerySet:
+    """Published posts of the scope whose ``pub_date`` is still ahead."""
+    posts = Post.objects.filter(
+        is_published=True, pub_date__gt=timezone.now()
+    )
+    kind, _, value = scope.partition(':')
+    if scope == INDEX_SCOPE:
+        return in_published_categories(posts)
+    if kind == 'category':
+        category = registry.get_published_category(value)
+        if category is None:
+            return posts.none()
+        return posts.filter(category_id=category.pk)
+    if kind == 'profile':
+        return in_published_categories(
+            posts.filter(author__username=value)
+        )
+    if kind == 'post':
+        return posts.filter(pk=value)
+    return posts.none()
+
+
+def get_next_publication(scope: str) -> Optional[datetime]:
+    return get_scheduled_posts(scope).aggregate(next=Min('pub_date'))['next']
+
+
+def expire_scheduled(scopes: Iterable[str]) -> Optional[int]:
+    """Seconds until a scheduled post shows up in one of the scopes.
+
+    The moment is looked up once per scope version and kept under one key
+    per scope, for as long as a page. Scopes whose moment has come are
+    bumped, so their pages are rendered again with the post. None means
+    nothing is scheduled.
+    """
+    scopes = list(scopes)
+    versions = dict(zip(scopes, get_versions(scopes)))
+    keys = {scope: f'blog:scheduled:{scope}' for scope in scopes}
+    cached = cache.get_many(keys.values())
+    known = {
+        scope: cached[key]['at']
+        for scope, key in keys.items()
+        if key in cached and cached[key].get('version') == versions[scope]
+    }
+    now = timezone.now()
+    due = [
+        scope for scope, at in known.items() if at is not None and at <= now
+    ]
+    if due:
+        bump_versions(due)
+        versions.update(zip(due, get_versions(due)))
+        for scope in due:
+            del known[scope]
+    missing = {}
+    for scope in scopes:
+        if scope not in known:
+            known[scope] = get_next_publication(scope)
+            missing[keys[scope]] = {
+                'version': versions[scope],
+                'at': known[scope],
+            }
+    if missing:
+        cache.set_many(missing, settings.BLOG_PAGE_CACHE_TIMEOUT)
+    moments = [at for at in known.values() if at is not None]
+    if not moments:
+        return None
+    return max(1, math.ceil((min(moments) - now).total_seconds()))
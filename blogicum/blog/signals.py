@@ -0,0 +1,138 @@
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from blog.blobs import drop_references, get_post_files, replace_references
+from blog.cache import TAXONOMY_SCOPE, bump_versions, profile_scope
+from blog.jobs import enqueue_renditions
+from blog.models import (
+    Category,
+    Comment,
+    Location,
+    Post,
+    User,
+    comments_deleted,
+)
+from blog.registry import registry
+from blog.services import (
+    add_comment_to_counters,
+    forget_users,
+    get_comment_feed_scopes,
+    get_post_feed_scopes,
+    get_user_feed_scopes,
+    refresh_comment_counters,
+)
+
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, **kwargs):
+    if created:
+        add_comment_to_counters(instance)
+
+
+@receiver(comments_deleted)
+def count_deleted_comments(sender, post_ids, **kwargs):
+    refresh_comment_counters(post_ids)
+    bump_versions(get_comment_feed_scopes(post_ids))
+
+
+@receiver(pre_delete, sender=User)
+def remember_commented_posts(sender, instance, **kwargs):
+    # The user's comments go in a fast cascade that sends no signals.
+    instance.commented_post_ids = set(
+        Comment.objects.filter(author=instance).values_list(
+            'post_id', flat=True
+        )
+    )
+
+
+@receiver(post_delete, sender=User)
+def count_deleted_user_comments(sender, instance, **kwargs):
+    post_ids = getattr(instance, 'commented_post_ids', None)
+    if post_ids:
+        comments_deleted.send(sender=User, post_ids=post_ids)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+def invalidate_registry(sender, **kwargs):
+    registry.invalidate()
+    bump_versions([TAXONOMY_SCOPE])
+
+
+@receiver(post_save, sender=Post)
+def queue_post_image(sender, instance, update_fields, **kwargs):
+    if not instance.image_changed:
+        return
+    if update_fields is not None and 'image' not in update_fields:
+        return
+    replace_references(
+        get_post_files(
+            getattr(instance, 'loaded_image', None),
+            getattr(instance, 'loaded_renditions', None),
+        ),
+        get_post_files(instance.image.name, None),
+    )
+    instance.loaded_image = instance.image.name
+    instance.loaded_renditions = instance.renditions
+    if instance.image:
+        enqueue_renditions(instance)
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    drop_references(
+        get_post_files(instance.image.name, instance.renditions)
+    )
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    bump_versions(get_post_feed_scopes(instance))
+
+
+@receiver(post_save, sender=Comment)
+def invalidate_comment_feeds(sender, instance, **kwargs):
+    bump_versions(get_comment_feed_scopes([instance.post_id]))
+
+
+def _is_login_update(update_fields) -> bool:
+    return update_fields is not None and set(update_fields) <= {'last_login'}
+
+
+@receiver(pre_save, sender=User)
+def remember_username(sender, instance, update_fields, **kwargs):
+    if instance.pk is None or _is_login_update(update_fields):
+        return
+    instance.loaded_username = (
+        User.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_profile(sender, instance, update_fields=None, **kwargs):
+    if _is_login_update(update_fields):
+        return
+    scopes = []
+    usernames = {instance.username}
+    loaded_username = getattr(instance, 'loaded_username', None)
+    if loaded_username is not None:
+        usernames.add(loaded_username)
+        if loaded_username != instance.username:
+            # Cached feeds and posts show the old name next to the user's
+            # posts and comments.
+            scopes = get_user_feed_scopes(instance)
+    forget_users(usernames)
+    bump_versions(
+        [*scopes, *(profile_scope(username) for username in usernames)]
+    )
@@ -0,0 +1,100 @@
+import hashlib
+import os
+import tempfile
+from typing import Optional
+
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+HASH_CHUNK_SIZE = 64 * 1024
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+
+
+def get_content_hash(content: File) -> str:
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks(HASH_CHUNK_SIZE):
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+def get_hashed_name(name: str, digest: str) -> str:
+    """``post_images/photo.JPG`` -> ``post_images/ab/cd/abcd….jpg``: the
+    top directory of the name is kept, the rest comes from the digest."""
+    top = name.split('/', 1)[0] if '/' in name else ''
+    ext = os.path.splitext(name)[1].lower()
+    shards = [
+        digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH]
+        for level in range(SHARD_LEVELS)
+    ]
+    return '/'.join(filter(None, [top, *shards, f'{digest}{ext}']))
+
+
+def is_hashed_name(name: str) -> bool:
+    *directories, filename = name.split('/')
+    digest = os.path.splitext(filename)[0]
+    shards = directories[-SHARD_LEVELS:]
+    return (
+        len(digest) == 64
+        and len(shards) == SHARD_LEVELS
+        and all(
+            shard == digest[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH]
+            for level, shard in enumerate(shards)
+        )
+    )
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """File system storage that names files by the SHA-256 of their content.
+
+    The same content is stored once, however many times it is uploaded,
+    in directories sharded by the leading bytes of the digest so none of
+    them grows too big. Files are written atomically, so two uploads of
+    the same content can't corrupt each other. Which files are still used
+    is tracked by blog.blobs.
+    """
+
+    def save(
+        self,
+        name: Optional[str],
+        content: File,
+        max_length: Optional[int] = None,
+    ) -> str:
+        if name is None:
+            name = content.name
+        if not hasattr(content, 'chunks'):
+            content = File(content, name)
+        name = get_hashed_name(
+            self.generate_filename(name), get_content_hash(content)
+        )
+        if self.exists(name):
+            # Tells the garbage collector the file is wanted again.
+            os.utime(self.path(name))
+        else:
+            self._save_atomic(name, content)
+        return name
+
+    def _save_atomic(self, name: str, content: File) -> None:
+        full_path = self.path(name)
+        directory = os.path.dirname(full_path)
+        os.makedirs(directory, exist_ok=True)
+        if self.directory_permissions_mode is not None:
+            os.chmod(directory, self.directory_permissions_mode)
+        descriptor, temporary_path = tempfile.mkstemp(dir=directory)
+        try:
+            with os.fdopen(descriptor, 'wb') as file:
+                for chunk in content.chunks():
+                    file.write(chunk)
+            if self.file_permissions_mode is not None:
+                os.chmod(temporary_path, self.file_permissions_mode)
+            os.replace(temporary_path, full_path)
+        except BaseException:
+            os.unlink(temporary_path)
+            raise
+
+
+image_storage = ContentAddressedStorage()
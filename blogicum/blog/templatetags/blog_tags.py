@@ -0,0 +1,109 @@
+import re
+from collections import defaultdict
+from typing import Dict
+
+from django import template
+from django.template.context import Context
+from django.templatetags.static import static
+from django.utils.html import format_html, format_html_join
+from django.utils.safestring import SafeString, mark_safe
+
+from blog.images import MIME_TYPES, MODERN_FORMATS, Rendition
+from blog.models import Post
+
+register = template.Library()
+
+HOLE_MARKER = '<!--hole:{}-->'
+HOLE_PATTERN = re.compile(r'<!--hole:([\w./-]+)-->')
+PLACEHOLDER = 'img/image-placeholder.svg'
+# Widths in CSS pixels post images are shown at, by layout.
+LAYOUT_WIDTHS: Dict[str, int] = {
+    'card': 608,
+    'detail': 608,
+}
+
+
+@register.simple_tag(takes_context=True)
+def hole(context: Context, template_name: str) -> SafeString:
+    """Includes a per-user fragment of a page.
+
+    When a page is rendered for the shared cache (``page_holes`` is set in
+    the context) a marker is left instead, to be filled for every request.
+    """
+    if context.get('page_holes'):
+        return mark_safe(HOLE_MARKER.format(template_name))
+    fragment = context.template.engine.get_template(template_name)
+    return fragment.render(context)
+
+
+@register.simple_tag
+def post_image(
+    post: Post, layout: str, css_class: str = '', lazy: bool = False
+) -> SafeString:
+    """``<picture>`` of the post image shown at ``layout`` width.
+
+    Browsers pick the smallest rendition enough for the screen from the
+    first format they support; ``<img>`` falls back to JPEG or PNG and
+    carries the size, so the page does not jump when it loads. While the
+    renditions are being rendered a placeholder is shown.
+    """
+    if not post.renditions:
+        return format_html(
+            '<img class="{}" src="{}" alt="{}">',
+            css_class,
+            static(PLACEHOLDER),
+            'Изображение обрабатывается',
+        )
+    by_format = defaultdict(list)
+    for key, name in post.renditions.items():
+        rendition = Rendition.parse(key)
+        if rendition is not None:
+            by_format[rendition.format].append((rendition, name))
+    fallback = next(
+        (format for format in by_format if format not in MODERN_FORMATS),
+        None,
+    )
+    if fallback is None:
+        return format_html(
+            '<img class="{}" src="{}" alt="{}">',
+            css_class,
+            post.image.url,
+            post.title,
+        )
+    storage = post.image.storage
+    width = LAYOUT_WIDTHS[layout]
+    sizes = f'(max-width: {width}px) 100vw, {width}px'
+
+    def srcset(format: str) -> str:
+        return ', '.join(
+            f'{storage.url(name)} {rendition.width}w'
+            for rendition, name in sorted(by_format[format])
+        )
+
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        (
+            (MIME_TYPES[format], srcset(format), sizes)
+            for format in MODERN_FORMATS
+            if format in by_format
+        ),
+    )
+    renditions = sorted(by_format[fallback])
+    rendition, name = next(
+        (item for item in renditions if item[0].width >= width),
+        renditions[-1],
+    )
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}" '
+        'width="{}" height="{}" alt="{}" loading="{}"></picture>',
+        sources,
+        css_class,
+        storage.url(name),
+        srcset(fallback),
+        sizes,
+        rendition.width,
+        rendition.height,
+        post.title,
+        'lazy' if lazy else 'eager',
+    )
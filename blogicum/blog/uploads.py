@@ -0,0 +1,127 @@
+from io import BytesIO
+from typing import IO, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import (
+    TemporaryUploadedFile,
+    UploadedFile,
+)
+from django.core.files.uploadhandler import FileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from PIL import Image
+
+# Formats a post image may be uploaded in.
+IMAGE_FORMATS: Tuple[str, ...] = ('JPEG', 'PNG', 'GIF', 'WEBP')
+
+
+class RejectedUpload(UploadedFile):
+    """Stands for an upload that was too big to keep; only its name and
+    size are known."""
+
+    def __init__(
+        self,
+        name: str,
+        content_type: str,
+        size: int,
+        charset: Optional[str],
+    ) -> None:
+        super().__init__(BytesIO(), name, content_type, size, charset)
+
+
+class BoundedUploadHandler(FileUploadHandler):
+    """Streams every uploaded file to a temporary file on disk.
+
+    A file bigger than ``BLOG_UPLOAD_MAX_BYTES`` is dropped as soon as it
+    passes the limit and the rest of it is read and discarded, so the
+    other fields of the form still arrive and it can report the error.
+    """
+
+    def __init__(self, request=None) -> None:
+        super().__init__(request)
+        self.max_bytes = settings.BLOG_UPLOAD_MAX_BYTES
+
+    def new_file(self, *args, **kwargs) -> None:
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.file = TemporaryUploadedFile(
+            self.file_name,
+            self.content_type,
+            0,
+            self.charset,
+            self.content_type_extra,
+        )
+
+    def receive_data_chunk(self, raw_data: bytes, start: int) -> None:
+        self.received += len(raw_data)
+        if self.file is None:
+            return None
+        if self.received > self.max_bytes:
+            # Closing the temporary file deletes it.
+            self.file.close()
+            self.file = None
+            return None
+        self.file.write(raw_data)
+        return None
+
+    def file_complete(self, file_size: int) -> UploadedFile:
+        if self.file is None:
+            return RejectedUpload(
+                self.file_name, self.content_type, file_size, self.charset
+            )
+        self.file.seek(0)
+        self.file.size = file_size
+        return self.file
+
+    def upload_interrupted(self) -> None:
+        if getattr(self, 'file', None) is not None:
+            self.file.close()
+
+
+def check_upload_size(file: UploadedFile) -> None:
+    if isinstance(file, RejectedUpload):
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={'limit': filesizeformat(settings.BLOG_UPLOAD_MAX_BYTES)},
+        )
+
+
+def too_many_pixels() -> ValidationError:
+    return ValidationError(
+        'Изображение больше %(megapixels)s мегапикселей.',
+        code='image_too_large',
+        params={
+            'megapixels': f'{settings.BLOG_IMAGE_MAX_PIXELS / 1_000_000:g}'
+        },
+    )
+
+
+def check_image_header(file: IO[bytes]) -> None:
+    """Validates the size of an image by its header, without decoding it.
+
+    Pillow only parses the header when the image is opened, so neither a
+    huge image nor a decompression bomb gets its pixels allocated.
+    """
+    file.seek(0)
+    try:
+        with Image.open(file, formats=IMAGE_FORMATS) as image:
+            width, height = image.size
+    except Image.DecompressionBombError:
+        raise too_many_pixels()
+    except (OSError, SyntaxError):
+        raise ValidationError(
+            'Загрузите изображение в формате JPEG, PNG, GIF или WebP.',
+            code='invalid_image',
+        )
+    finally:
+        file.seek(0)
+    max_side = settings.BLOG_IMAGE_MAX_SIDE
+    if max(width, height) > max_side:
+        raise ValidationError(
+            'Изображение больше %(max_side)s пикселей по стороне.',
+            code='image_too_large',
+            params={'max_side': max_side},
+        )
+    if width * height > settings.BLOG_IMAGE_MAX_PIXELS:
+        raise too_many_pixels()
@@ -1,5 +1,7 @@
-from typing import Any, Dict
+import copy
+from typing import Any, Dict, List, Set
 
+from django.conf import settings
 from django.urls import reverse
 from django.db.models.query import QuerySet
 from django.shortcuts import (
@@ -7,11 +9,11 @@ from django.shortcuts import (
     get_object_or_404,
     redirect,
 )
-from django.utils import timezone
+from django.db import transaction
 from django.http import HttpRequest, HttpResponse, Http404
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.core.exceptions import ObjectDoesNotExist
+from django.core.paginator import InvalidPage
 from django.views.generic import (
     CreateView,
     DetailView,
@@ -20,18 +22,81 @@ from django.views.generic import (
     DeleteView,
 )
 
-from blog.models import Post, User, Category, Comment
+from blog.models import Post, User, Comment
 from blog.forms import PostForm, UserForm, CommentForm
+from blog.cache import (
+    INDEX_SCOPE,
+    category_scope,
+    post_scope,
+    profile_scope,
+    render_post_cards,
+)
+from blog.mixins import (
+    ConditionalGetMixin,
+    OnlyAuthorMixin,
+    PageCacheMixin,
+)
+from blog.paginators import CursorPaginator, FeedPaginator
+from blog.registry import registry
 from blog.services import (
     get_posts,
     get_category_posts,
     get_profile_posts,
-    get_object,
-    validate_user,
+    get_user_by_username,
+    get_visible_posts,
 )
 
 
 POSTS_ON_PAGE: int = 10
+PAGES_AROUND_CURRENT: int = 2
+
+
+class FeedPaginationMixin:
+    paginate_by = POSTS_ON_PAGE
+    cursor_kwarg = 'cursor'
+
+    def get_paginator(
+        self, queryset: QuerySet, per_page: int, **kwargs: Any
+    ) -> FeedPaginator:
+        return FeedPaginator(
+            queryset,
+            per_page,
+            self.get_cache_scopes(),
+            'own' if self.is_personal_page() else 'public',
+            **kwargs,
+        )
+
+    def prepare_posts(self, posts: List[Post]) -> List[Post]:
+        return registry.attach(posts)
+
+    def paginate_queryset(self, queryset: QuerySet, page_size: int):
+        if settings.BLOG_CURSOR_PAGINATION:
+            paginator = CursorPaginator(queryset, page_size)
+            try:
+                page = paginator.page(
+                    self.request.GET.get(self.cursor_kwarg)
+                )
+            except InvalidPage as e:
+                raise Http404(str(e))
+            is_paginated = page.has_other_pages()
+        else:
+            paginator, page, _, is_paginated = super().paginate_queryset(
+                queryset, page_size
+            )
+        page.object_list = self.prepare_posts(page.object_list)
+        render_post_cards(page.object_list)
+        return paginator, page, page.object_list, is_paginated
+
+    def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
+        context = super().get_context_data(**kwargs)
+        page = context['page_obj']
+        if page is not None and not getattr(page, 'is_cursor', False):
+            context['page_range'] = list(
+                page.paginator.get_elided_page_range(
+                    page.number, on_each_side=PAGES_AROUND_CURRENT, on_ends=1
+                )
+            )
+        return context
 
 
 class PostCreateView(LoginRequiredMixin, CreateView):
@@ -48,51 +113,37 @@ class PostCreateView(LoginRequiredMixin, CreateView):
         )
 
 
-class PostDetailView(DetailView):
+class PostDetailView(ConditionalGetMixin, PageCacheMixin, DetailView):
     model = Post
 
-    def get(
-        self, request: HttpRequest, *args: Any, **kwargs: Any
-    ) -> HttpResponse:
-        try:
-            obj = get_object(
-                Post,
-                self.kwargs['pk'],
-                ('author',),
-            )
-            if (
-                not obj.is_published or obj.pub_date > timezone.now()
-            ) and obj.author.username != self.request.user.username:
-                raise Http404('Такого поста не существует')
-            return super().get(request, *args, **kwargs)
-        except ObjectDoesNotExist:
-            raise Http404('Такого поста не существует')
+    def get_cache_scopes(self) -> List[str]:
+        return [post_scope(self.kwargs['pk'])]
+
+    def get_page_participants(self) -> Set[int]:
+        return {
+            self.object.author_id,
+            *(comment.author_id for comment in self.object.comments.all()),
+        }
+
+    def get_hole_context(self) -> Dict[str, Any]:
+        return {'post': {'id': self.kwargs['pk']}, 'form': CommentForm()}
+
+    def get_queryset(self) -> QuerySet[Any]:
+        return get_visible_posts(self.request.user)
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
         context['form'] = CommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = self.object.comments.all()
         return context
 
 
-class PostUpdateView(LoginRequiredMixin, UpdateView):
+class PostUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
     model = Post
     form_class = PostForm
 
-    @validate_user
-    def get(
-        self, request: HttpRequest, *args: str, **kwargs: Any
-    ) -> HttpResponse:
-        return super().get(request, *args, **kwargs)
-
-    @validate_user
-    def post(
-        self, request: HttpRequest, *args: str, **kwargs: Any
-    ) -> HttpResponse:
-        return super().post(request, *args, **kwargs)
-
 
-class PostDeleteView(LoginRequiredMixin, DeleteView):
+class PostDeleteView(LoginRequiredMixin, OnlyAuthorMixin, DeleteView):
     model = Post
     template_name = 'blog/post_form.html'
 
@@ -101,18 +152,6 @@ class PostDeleteView(LoginRequiredMixin, DeleteView):
             'blog:profile', kwargs={'username': self.request.user.username}
         )
 
-    @validate_user
-    def get(
-        self, request: HttpRequest, *args: Any, **kwargs: Any
-    ) -> HttpResponse:
-        return super().get(request, *args, **kwargs)
-
-    @validate_user
-    def post(
-        self, request: HttpRequest, *args: str, **kwargs: Any
-    ) -> HttpResponse:
-        return super().post(request, *args, **kwargs)
-
 
 @login_required
 def comment(request: HttpRequest, pk: int):
@@ -122,11 +161,12 @@ def comment(request: HttpRequest, pk: int):
         comment = form.save(commit=False)
         comment.author = request.user
         comment.post = post
-        comment.save()
+        with transaction.atomic():
+            comment.save()
     return redirect('blog:post_detail', pk=pk)
 
 
-class CommentUpdateView(LoginRequiredMixin, UpdateView):
+class CommentUpdateView(LoginRequiredMixin, OnlyAuthorMixin, UpdateView):
     model = Comment
     pk_url_kwarg = 'comment_id'
     template_name = 'blog/comment.html'
@@ -135,20 +175,8 @@ class CommentUpdateView(LoginRequiredMixin, UpdateView):
     def get_success_url(self) -> str:
         return reverse('blog:post_detail', kwargs={'pk': self.kwargs['pk']})
 
-    @validate_user
-    def get(
-        self, request: HttpRequest, *args: str, **kwargs: Any
-    ) -> HttpResponse:
-        return super().get(request, *args, **kwargs)
-
-    @validate_user
-    def post(
-        self, request: HttpRequest, *args: str, **kwargs: Any
-    ) -> HttpResponse:
-        return super().post(request, *args, **kwargs)
-
 
-class CommentDeleteView(LoginRequiredMixin, DeleteView):
+class CommentDeleteView(LoginRequiredMixin, OnlyAuthorMixin, DeleteView):
     model = Comment
     pk_url_kwarg = 'comment_id'
     template_name = 'blog/comment.html'
@@ -156,61 +184,79 @@ class CommentDeleteView(LoginRequiredMixin, DeleteView):
     def get_success_url(self) -> str:
         return reverse('blog:post_detail', kwargs={'pk': self.kwargs['pk']})
 
-    @validate_user
-    def get(
-        self, request: HttpRequest, *args: Any, **kwargs: Any
-    ) -> HttpResponse:
-        return super().get(request, *args, **kwargs)
 
-    @validate_user
-    def post(
-        self, request: HttpRequest, *args: str, **kwargs: Any
-    ) -> HttpResponse:
-        return super().post(request, *args, **kwargs)
-
-
-class PostListView(ListView):
+class PostListView(
+    ConditionalGetMixin, PageCacheMixin, FeedPaginationMixin, ListView
+):
     model = Post
-    paginate_by = POSTS_ON_PAGE
+
+    def get_cache_scopes(self) -> List[str]:
+        return [INDEX_SCOPE]
 
     def get_queryset(self) -> QuerySet[Any]:
         return get_posts()
 
 
-class CategoryListView(ListView):
+class CategoryListView(
+    ConditionalGetMixin, PageCacheMixin, FeedPaginationMixin, ListView
+):
     template_name = 'blog/category.html'
     model = Post
-    paginate_by = POSTS_ON_PAGE
+
+    def get(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        self.category = registry.get_published_category(
+            self.kwargs['category_slug']
+        )
+        if self.category is None:
+            raise Http404('Категория не найдена')
+        return super().get(request, *args, **kwargs)
+
+    def get_cache_scopes(self) -> List[str]:
+        return [category_scope(self.kwargs['category_slug'])]
 
     def get_queryset(self) -> QuerySet[Any]:
-        return get_category_posts(self.kwargs['category_slug'])
+        return get_category_posts(self.category)
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context['category'] = get_object_or_404(
-            Category,
-            slug=self.kwargs['category_slug'],
-            is_published=True,
-        )
+        context['category'] = self.category
         return context
 
 
-class ProfileListView(ListView):
+class ProfileListView(
+    ConditionalGetMixin, PageCacheMixin, FeedPaginationMixin, ListView
+):
     model = Post
     template_name = 'blog/profile.html'
-    paginate_by = POSTS_ON_PAGE
+
+    def get(
+        self, request: HttpRequest, *args: Any, **kwargs: Any
+    ) -> HttpResponse:
+        self.profile = get_user_by_username(self.kwargs['username'])
+        if self.profile is None:
+            raise Http404('Пользователь не найден')
+        return super().get(request, *args, **kwargs)
+
+    def get_cache_scopes(self) -> List[str]:
+        return [profile_scope(self.kwargs['username'])]
+
+    def is_personal_page(self) -> bool:
+        return self.request.user.username == self.kwargs['username']
 
     def get_queryset(self) -> QuerySet[Any]:
-        return get_profile_posts(
-            self.request.user.username == self.kwargs['username'],
-            self.kwargs['username'],
-        )
+        return get_profile_posts(self.is_personal_page(), self.profile.pk)
+
+    def prepare_posts(self, posts: List[Post]) -> List[Post]:
+        posts = super().prepare_posts(posts)
+        for post in posts:
+            Post.author.field.set_cached_value(post, self.profile)
+        return posts
 
     def get_context_data(self, **kwargs: Any) -> Dict[str, Any]:
         context = super().get_context_data(**kwargs)
-        context['profile'] = get_object_or_404(
-            User, username=self.kwargs['username']
-        )
+        context['profile'] = self.profile
         return context
 
 
@@ -221,7 +267,8 @@ class ProfileUpdateView(LoginRequiredMixin, UpdateView):
 
 @login_required
 def profile_edit(request: HttpRequest) -> HttpResponse:
-    instance = get_object_or_404(User, username=request.user)
+    # A copy, so the header keeps the saved username if the form is invalid.
+    instance = copy.copy(request.user)
     form = UserForm(request.POST or None, instance=instance)
     if form.is_valid():
         form.save()
@@ -0,0 +1,134 @@
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple, Optional
+
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.signals import request_started
+from django.db import connections
+from django.db.models import Count
+from django.test import RequestFactory
+from django.urls import resolve, reverse
+
+from blog.services import get_posts
+from blog.views import POSTS_ON_PAGE
+
+logger = logging.getLogger('blog.warmup')
+
+
+class Warmed(NamedTuple):
+    url: str
+    status: Optional[int]
+    seconds: float
+    error: str = ''
+
+
+def get_feed_urls(url: str, posts: int, pages: int) -> List[str]:
+    pages = min(pages, math.ceil(posts / POSTS_ON_PAGE))
+    return [url, *(f'{url}?page={page}' for page in range(2, pages + 1))]
+
+
+def get_warm_urls(pages: int, categories: int, posts: int) -> List[str]:
+    """Feed pages of the index and the biggest categories, then the most
+    commented posts."""
+    category_sizes = (
+        get_posts()
+        .order_by()
+        .values('category__slug')
+        .annotate(posts=Count('pk'))
+        .order_by('-posts')
+        .values_list('category__slug', 'posts')[:categories]
+    )
+    post_ids = (
+        get_posts()
+        .order_by('-comment_count', '-pub_date')
+        .values_list('pk', flat=True)[:posts]
+    )
+    return [
+        *get_feed_urls(reverse('blog:index'), get_posts().count(), pages),
+        *(
+            url
+            for slug, size in category_sizes
+            for url in get_feed_urls(
+                reverse(
+                    'blog:category_posts', kwargs={'category_slug': slug}
+                ),
+                size,
+                pages,
+            )
+        ),
+        *(reverse('blog:post_detail', kwargs={'pk': pk}) for pk in post_ids),
+    ]
+
+
+def warm_url(url: str) -> Warmed:
+    """Renders the page for an anonymous visitor, which stores it in the
+    page cache."""
+    started = time.monotonic()
+    request = RequestFactory().get(url)
+    request.user = AnonymousUser()
+    try:
+        match = resolve(request.path_info)
+        response = match.func(request, *match.args, **match.kwargs)
+        return Warmed(url, response.status_code, time.monotonic() - started)
+    except Exception as error:
+        return Warmed(url, None, time.monotonic() - started, repr(error))
+    finally:
+        connections.close_all()
+
+
+def warm(
+    urls: List[str], concurrency: int, time_limit: float
+) -> List[Optional[Warmed]]:
+    """Warms the pages in order; those not started within ``time_limit``
+    seconds are skipped and reported as None."""
+    deadline = time.monotonic() + time_limit
+
+    def task(url: str) -> Optional[Warmed]:
+        if time.monotonic() >= deadline:
+            return None
+        return warm_url(url)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(task, urls))
+
+
+_started = threading.Event()
+_start_lock = threading.Lock()
+
+
+def warm_on_start(**kwargs) -> None:
+    """Warms the caches in the background on the first request of a
+    worker."""
+    with _start_lock:
+        if _started.is_set():
+            return
+        _started.set()
+    request_started.disconnect(warm_on_start)
+
+    def run():
+        try:
+            results = warm(
+                get_warm_urls(
+                    settings.BLOG_WARM_PAGES,
+                    settings.BLOG_WARM_CATEGORIES,
+                    settings.BLOG_WARM_POSTS,
+                ),
+                settings.BLOG_WARM_CONCURRENCY,
+                settings.BLOG_WARM_TIME_LIMIT,
+            )
+        except Exception:
+            logger.exception('Cache warm-up failed')
+            return
+        finally:
+            connections.close_all()
+        logger.info(
+            'Warmed %d of %d pages',
+            sum(result is not None for result in results),
+            len(results),
+        )
+
+    threading.Thread(target=run, name='blog-warmup', daemon=True).start()
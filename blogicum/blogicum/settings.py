@@ -16,6 +16,13 @@ import os
 
 env = environ.Env(
     DEBUG=(bool, True),
+    BLOG_CURSOR_PAGINATION=(bool, False),
+    QUERY_BUDGET_MIDDLEWARE=(bool, False),
+    BLOG_PAGE_CACHE_TIMEOUT=(int, 0),
+    CACHE_LOCAL_TIER=(bool, False),
+    BLOG_EXACT_COUNT_LIMIT=(int, 10000),
+    BLOG_WARM_ON_START=(bool, False),
+    BLOG_UPLOAD_MAX_BYTES=(int, 10 * 1024 * 1024),
     SECRET_KEY=(
         str,
         'django-insecure-n9%!$19%br0b&98h53!r0k46iox6pm^7o95@d0r03qk-yrq)5u',
@@ -70,6 +77,9 @@ MIDDLEWARE = [
     'debug_toolbar.middleware.DebugToolbarMiddleware',
 ]
 
+if env('QUERY_BUDGET_MIDDLEWARE'):
+    MIDDLEWARE.insert(0, 'blog.middleware.QueryBudgetMiddleware')
+
 ROOT_URLCONF = 'blogicum.urls'
 
 TEMPLATES_DIR = BASE_DIR / 'templates'
@@ -103,6 +113,26 @@ DATABASES = {
     }
 }
 
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://'),
+}
+
+# With CACHE_LOCAL_TIER every worker keeps the hottest entries of the
+# CACHE_URL cache in memory; see blog.cache_backends.TwoTierCache.
+if env('CACHE_LOCAL_TIER'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'blog.cache_backends.TwoTierCache',
+            'LOCATION': 'shared',
+            'OPTIONS': {
+                'MAX_ENTRIES': 1000,
+                'MAX_BYTES': 32 * 1024 * 1024,
+                'CHECK_INTERVAL': 1.0,
+            },
+        },
+        'shared': CACHES['default'],
+    }
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -166,3 +196,60 @@ MEDIA_ROOT = BASE_DIR / 'media'
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 
 EMAIL_FILE_PATH = BASE_DIR / 'sent_emails'
+
+# Keyset pagination for the post feeds: pages are addressed by an opaque
+# ?cursor= instead of ?page=, so deep pages cost the same as the first one.
+BLOG_CURSOR_PAGINATION = env('BLOG_CURSOR_PAGINATION')
+
+# Maximum number of SQL queries per view, session and user lookups, a
+# reload of the category/location registry and the lookup of the next
+# scheduled post of the page included.
+# blog.middleware.QueryBudgetMiddleware logs views that exceed it; the test
+# suite enables the middleware with QUERY_BUDGET_RAISE to fail on them.
+QUERY_BUDGETS = {
+    'blog:index': 7,
+    'blog:category_posts': 7,
+    'blog:profile': 8,
+    'blog:post_detail': 5,
+    'blog:create_post': 12,
+    'blog:edit_post': 13,
+    'blog:delete_post': 10,
+    'blog:add_comment': 8,
+    'blog:edit_comment': 6,
+    'blog:delete_comment': 7,
+    'blog:edit_profile': 6,
+}
+
+QUERY_BUDGET_RAISE = False
+
+# Seconds a rendered feed or post page is kept in the cache; 0 (the default)
+# disables the cache. Pages are retired earlier by version stamps when their
+# content changes or a scheduled post of theirs gets published.
+# Only enable it with a CACHE_URL shared by all workers: the default locmem
+# cache is per process, so a worker would miss the stamps bumped by the
+# others and keep serving its stale pages until they expire.
+BLOG_PAGE_CACHE_TIMEOUT = env('BLOG_PAGE_CACHE_TIMEOUT')
+
+# Feeds with more posts than this are counted by the query planner's
+# estimate where the database provides one (PostgreSQL).
+BLOG_EXACT_COUNT_LIMIT = env('BLOG_EXACT_COUNT_LIMIT')
+
+# Pages pre-rendered by the warm_caches command and, with
+# BLOG_WARM_ON_START, by every worker after its first request: the first
+# BLOG_WARM_PAGES pages of the index and of the BLOG_WARM_CATEGORIES
+# biggest categories, then the BLOG_WARM_POSTS most commented posts.
+BLOG_WARM_ON_START = env('BLOG_WARM_ON_START')
+BLOG_WARM_PAGES = 3
+BLOG_WARM_CATEGORIES = 5
+BLOG_WARM_POSTS = 20
+BLOG_WARM_CONCURRENCY = 4
+BLOG_WARM_TIME_LIMIT = 30
+
+# Uploaded files are streamed to temporary files, never kept in memory;
+# the rest of a file bigger than BLOG_UPLOAD_MAX_BYTES is discarded and the
+# form rejects it. Post images are checked by their header against the
+# limits below before Pillow decodes any pixels.
+FILE_UPLOAD_HANDLERS = ['blog.uploads.BoundedUploadHandler']
+BLOG_UPLOAD_MAX_BYTES = env('BLOG_UPLOAD_MAX_BYTES')
+BLOG_IMAGE_MAX_SIDE = 10000
+BLOG_IMAGE_MAX_PIXELS = 40_000_000
@@ -33,6 +33,7 @@ class PostModelAdapter(StudentModelAdapter):
             "author",
             "category",
             "location",
+            "updated_at",
             "refresh_from_db",
         ]
 
@@ -41,6 +41,24 @@ def enable_debug_false():
         yield
 
 
+@pytest.fixture(autouse=True)
+def clear_caches():
+    """Caches outlive the per-test database rollback, so start each test
+    with empty ones."""
+    from django.core.cache import cache
+    from blog.registry import registry
+
+    cache.clear()
+    registry.clear()
+
+
+@pytest.fixture(autouse=True)
+def enable_page_cache(settings):
+    """The page cache is off by default; the tests run in one process, so
+    its locmem cache is safe to use."""
+    settings.BLOG_PAGE_CACHE_TIMEOUT = 300
+
+
 class SafeImportFromContextManager:
     def __init__(
             self,
@@ -93,6 +111,7 @@ pytest_plugins = [
     "fixtures.categories",
     "fixtures.comments",
     "adapters.comment",
+    "plugins.query_budget",
 ]
 
 
@@ -0,0 +1,13 @@
+import pytest
+
+QUERY_BUDGET_MIDDLEWARE = "blog.middleware.QueryBudgetMiddleware"
+
+
+@pytest.fixture(autouse=True)
+def enforce_query_budgets(settings):
+    """Every request made by a test client must fit into its view's
+    budget from `settings.QUERY_BUDGETS`, otherwise the test fails with
+    `QueryBudgetExceeded` listing the queries that were run."""
+    if QUERY_BUDGET_MIDDLEWARE not in settings.MIDDLEWARE:
+        settings.MIDDLEWARE = [QUERY_BUDGET_MIDDLEWARE, *settings.MIDDLEWARE]
+    settings.QUERY_BUDGET_RAISE = True
@@ -0,0 +1,86 @@
+import pytest
+from django.core.cache import caches
+from django.test import override_settings
+
+from blog.cache_backends import TwoTierCache
+
+SHARED = "blog-test-shared"
+
+
+@pytest.fixture
+def shared_cache():
+    with override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            },
+            SHARED: {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+                "LOCATION": SHARED,
+            },
+        }
+    ):
+        yield caches[SHARED]
+        caches[SHARED].clear()
+
+
+def make_worker(**options) -> TwoTierCache:
+    return TwoTierCache(SHARED, {"OPTIONS": options})
+
+
+def test_local_hits_skip_shared_tier(shared_cache, monkeypatch):
+    worker = make_worker(CHECK_INTERVAL=60)
+    worker.set("key", {"value": 1})
+    monkeypatch.setattr(
+        shared_cache,
+        "get_many",
+        lambda *args, **kwargs: pytest.fail(
+            "Убедитесь, что горячий ключ читается из локального уровня."
+        ),
+    )
+
+    assert worker.get("key") == {"value": 1}
+
+
+def test_writes_of_other_worker_invalidate_local_copies(shared_cache):
+    worker, other_worker = make_worker(), make_worker(CHECK_INTERVAL=0)
+    worker.set("key", "old")
+    assert other_worker.get("key") == "old"
+
+    worker.set("key", "new")
+    assert other_worker.get("key") == "new", (
+        "Убедитесь, что локальная копия сверяется со штампом версии"
+        " в общем кеше и обновляется после записи другим процессом."
+    )
+
+    worker.delete("key")
+    assert other_worker.get("key") is None, (
+        "Убедитесь, что ключ, удалённый другим процессом, не отдаётся"
+        " из локального уровня."
+    )
+
+
+def test_local_tier_is_bounded(shared_cache):
+    worker = make_worker(MAX_ENTRIES=2, MAX_BYTES=10**6)
+    for key in ("first", "second", "third"):
+        worker.set(key, key)
+    assert list(worker._local) == [
+        worker.make_key("second"),
+        worker.make_key("third"),
+    ], "Убедитесь, что локальный уровень вытесняет давно не читанные ключи."
+    assert worker.get("first") == "first"
+
+    small_worker = make_worker(MAX_BYTES=1000)
+    small_worker.set("large", "x" * 2000)
+    assert not small_worker._local, (
+        "Убедитесь, что локальный уровень ограничен по объёму."
+    )
+    assert small_worker.get("large") == "x" * 2000
+
+
+def test_add_is_atomic_in_shared_tier(shared_cache):
+    worker, other_worker = make_worker(), make_worker()
+    assert worker.add("lock", 1)
+    assert not other_worker.add("lock", 2)
+    worker.delete("lock")
+    assert other_worker.add("lock", 2)
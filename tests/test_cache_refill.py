@@ -0,0 +1,160 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from django.core.cache import cache
+
+from blog import cache as blog_cache
+from blog.cache import get_or_refill
+
+KEY = "blog:test:refill"
+N_CONCURRENT = 20
+
+
+def slow_compute(calls, value="fresh", delay=0.2):
+    def compute():
+        calls.append(threading.get_ident())
+        time.sleep(delay)
+        return value
+
+    return compute
+
+
+def test_concurrent_misses_are_coalesced():
+    calls = []
+    compute = slow_compute(calls)
+    barrier = threading.Barrier(N_CONCURRENT)
+
+    def request():
+        barrier.wait()
+        return get_or_refill(KEY, "1", compute, 60)
+
+    with ThreadPoolExecutor(N_CONCURRENT) as pool:
+        results = list(pool.map(lambda _: request(), range(N_CONCURRENT)))
+
+    assert len(calls) == 1, (
+        "Убедитесь, что при одновременных промахах кэша значение "
+        "вычисляется только один раз."
+    )
+    assert results == [("fresh", True)] * N_CONCURRENT, (
+        "Убедитесь, что все одновременные запросы получают вычисленное "
+        "значение."
+    )
+    assert get_or_refill(KEY, "1", slow_compute(calls), 60) == (
+        "fresh",
+        True,
+    )
+    assert len(calls) == 1, (
+        "Убедитесь, что вычисленное значение сохраняется в кэше."
+    )
+
+
+def test_stale_value_is_served_while_refill_is_locked():
+    cache.set(KEY, {"stamp": "1", "value": "stale"})
+    cache.add(f"{KEY}:refill", "2")
+    calls = []
+
+    result = get_or_refill(KEY, "2", slow_compute(calls), 60)
+
+    assert result == ("stale", False), (
+        "Убедитесь, что пока другой процесс обновляет значение, "
+        "отдаётся устаревшая копия."
+    )
+    assert not calls, (
+        "Убедитесь, что значение не пересчитывается, пока другой процесс "
+        "держит блокировку."
+    )
+
+
+def test_waits_for_value_refilled_by_another_worker(monkeypatch):
+    monkeypatch.setattr(blog_cache, "REFILL_POLL_INTERVAL", 0.01)
+    cache.add(f"{KEY}:refill", "1")
+    timer = threading.Timer(
+        0.1, cache.set, (KEY, {"stamp": "1", "value": "refilled"})
+    )
+    calls = []
+
+    timer.start()
+    try:
+        result = get_or_refill(KEY, "1", slow_compute(calls), 60)
+    finally:
+        timer.cancel()
+
+    assert result == ("refilled", True), (
+        "Убедитесь, что без устаревшей копии запрос дожидается значения, "
+        "вычисленного другим процессом."
+    )
+    assert not calls
+
+
+def run_with_leader(leader_compute, follower_compute):
+    """Runs a refill and, once it has started, a second one of the same
+    key in another thread; returns both outcomes."""
+    started = threading.Event()
+
+    def compute():
+        started.set()
+        return leader_compute()
+
+    with ThreadPoolExecutor(2) as pool:
+        leader = pool.submit(get_or_refill, KEY, "2", compute, 60)
+        started.wait()
+        follower = pool.submit(get_or_refill, KEY, "2", follower_compute, 60)
+        return leader, follower.result()
+
+
+def failing_compute():
+    time.sleep(0.1)
+    raise RuntimeError("refill failed")
+
+
+def test_refill_error_does_not_fail_waiters():
+    leader, result = run_with_leader(failing_compute, lambda: "own")
+
+    with pytest.raises(RuntimeError):
+        leader.result()
+    assert result == ("own", True), (
+        "Убедитесь, что ошибка обновления не передаётся ожидающим "
+        "запросам: они вычисляют значение сами."
+    )
+    assert cache.get(f"{KEY}:refill") is None, (
+        "Убедитесь, что блокировка обновления снимается после ошибки."
+    )
+    assert get_or_refill(KEY, "2", lambda: "fresh", 60) == ("fresh", True)
+
+
+def test_refill_error_serves_stale_to_waiters():
+    cache.set(KEY, {"stamp": "1", "value": "stale"})
+    leader, result = run_with_leader(failing_compute, lambda: "own")
+
+    with pytest.raises(RuntimeError):
+        leader.result()
+    assert result == ("stale", False), (
+        "Убедитесь, что при ошибке обновления ожидающие запросы получают "
+        "устаревшую копию."
+    )
+
+
+def test_slow_refill_does_not_fail_waiters(monkeypatch):
+    monkeypatch.setattr(blog_cache, "REFILL_WAIT", 0.05)
+    calls = []
+    leader, result = run_with_leader(
+        slow_compute(calls, delay=0.5), lambda: "own"
+    )
+
+    assert result == ("own", True), (
+        "Убедитесь, что запрос, не дождавшийся долгого обновления, "
+        "вычисляет значение сам, а не завершается ошибкой."
+    )
+    assert leader.result() == ("fresh", True)
+
+    cache.set(KEY, {"stamp": "1", "value": "stale"})
+    leader, result = run_with_leader(
+        slow_compute(calls, delay=0.5), lambda: "own"
+    )
+    assert result == ("stale", False), (
+        "Убедитесь, что запрос, не дождавшийся долгого обновления, "
+        "получает устаревшую копию."
+    )
+    leader.result()
@@ -0,0 +1,145 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def post(post_with_published_location):
+    return post_with_published_location
+
+
+@pytest.fixture
+def another_post_for_counters(mixer: Mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category
+    )
+
+
+@pytest.fixture
+def published_post_for_counters(mixer: Mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+def add_comments(mixer: Mixer, post, count):
+    comments = mixer.cycle(count).blend("blog.Comment", post=post)
+    # created_at is auto_now_add, so it is spread out afterwards.
+    start = timezone.now() - timedelta(hours=count)
+    for hours, comment in enumerate(comments):
+        Comment.objects.filter(pk=comment.pk).update(
+            created_at=start + timedelta(hours=hours)
+        )
+    return list(Comment.objects.filter(post=post).order_by("created_at"))
+
+
+def test_counters_follow_created_comments(mixer: Mixer, post):
+    comments = add_comments(mixer, post, 3)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что при добавлении комментария увеличивается"
+        " счётчик комментариев публикации."
+    )
+    new = mixer.blend("blog.Comment", post=post)
+    post.refresh_from_db()
+    assert post.comment_count == 4
+    assert post.last_comment_at == new.created_at
+    assert new.created_at > comments[-1].created_at
+
+
+def test_counters_follow_deleted_comment(mixer: Mixer, post):
+    comments = add_comments(mixer, post, 3)
+    comments[-1].delete()
+    post.refresh_from_db()
+    assert post.comment_count == 2, (
+        "Убедитесь, что при удалении комментария уменьшается"
+        " счётчик комментариев публикации."
+    )
+    assert post.last_comment_at == comments[1].created_at, (
+        "Убедитесь, что после удаления последнего комментария дата"
+        " последнего комментария пересчитывается."
+    )
+
+
+def test_counters_follow_bulk_delete(
+    mixer: Mixer, post, another_post_for_counters
+):
+    add_comments(mixer, post, 3)
+    add_comments(mixer, another_post_for_counters, 2)
+    Comment.objects.filter(
+        post__in=[post, another_post_for_counters]
+    ).delete()
+    for item in (post, another_post_for_counters):
+        item.refresh_from_db()
+        assert item.comment_count == 0, (
+            "Убедитесь, что счётчики комментариев пересчитываются при"
+            " массовом удалении комментариев."
+        )
+        assert item.last_comment_at is None
+
+
+def test_post_comments_are_fast_deleted(mixer: Mixer, post):
+    add_comments(mixer, post, 5)
+    with CaptureQueriesContext(connection) as context:
+        post.delete()
+    assert not any(
+        query["sql"].startswith('SELECT "blog_comment"."id"')
+        for query in context.captured_queries
+    ), (
+        "Убедитесь, что комментарии удаляемой публикации удаляются одним"
+        " запросом, без загрузки каждого из них."
+    )
+    assert not Comment.objects.exists()
+
+
+def test_recount_comments_fixes_counters(mixer: Mixer, post):
+    comments = add_comments(mixer, post, 3)
+    Post.objects.filter(pk=post.pk).update(
+        comment_count=42, last_comment_at=None
+    )
+    call_command("recount_comments", batch_size=1)
+    post.refresh_from_db()
+    assert post.comment_count == 3, (
+        "Убедитесь, что команда recount_comments пересчитывает"
+        " количество комментариев."
+    )
+    assert post.last_comment_at == comments[-1].created_at
+
+
+def test_counters_follow_deleted_commenter(
+    mixer: Mixer, client, another_user, published_post_for_counters
+):
+    post = published_post_for_counters
+    mixer.blend("blog.Comment", post=post, text="Останется")
+    mixer.blend(
+        "blog.Comment", post=post, author=another_user, text="Исчезнет"
+    )
+    # Both pages get cached with the comments in place.
+    assert "Комментарии (2)" in client.get("/").content.decode("utf-8")
+    client.get(f"/posts/{post.pk}/")
+
+    another_user.delete()
+    post.refresh_from_db()
+    assert post.comment_count == 1, (
+        "Убедитесь, что при удалении пользователя счётчики комментариев"
+        " к публикациям пересчитываются."
+    )
+    assert "Комментарии (1)" in client.get("/").content.decode("utf-8"), (
+        "Убедитесь, что после удаления пользователя лента показывает"
+        " новое количество комментариев."
+    )
+    content = client.get(f"/posts/{post.pk}/").content.decode("utf-8")
+    assert "Исчезнет" not in content and "Останется" in content
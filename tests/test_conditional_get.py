@@ -0,0 +1,120 @@
+import time
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from django.utils.http import http_date
+from mixer.backend.django import Mixer
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def published_post(mixer: Mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+
+@pytest.fixture
+def page_urls(user, published_post):
+    return (
+        "/",
+        f"/category/{published_post.category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{published_post.id}/",
+    )
+
+
+def test_unchanged_pages_are_not_modified(
+    unlogged_client: Client, page_urls, django_assert_num_queries
+):
+    for url in page_urls:
+        response = unlogged_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert response.has_header("ETag"), (
+            f"Убедитесь, что ответ на запрос `{url}` содержит заголовок ETag."
+        )
+        assert not response.has_header("Last-Modified")
+        with django_assert_num_queries(0):
+            not_modified = unlogged_client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED, (
+            f"Убедитесь, что повторный запрос `{url}` с тем же ETag"
+            " получает ответ 304."
+        )
+        assert not not_modified.content
+
+
+def test_new_comment_changes_validators(
+    mixer: Mixer, unlogged_client: Client, another_user, published_post,
+    page_urls
+):
+    etags = {url: unlogged_client.get(url)["ETag"] for url in page_urls}
+    mixer.blend("blog.Comment", post=published_post, author=another_user)
+    for url, etag in etags.items():
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что после нового комментария страница `{url}`"
+            " отдаётся заново, а не ответом 304."
+        )
+
+
+def test_validators_depend_on_viewer(
+    user_client: Client, unlogged_client: Client, page_urls
+):
+    for url in page_urls:
+        anonymous_etag = unlogged_client.get(url)["ETag"]
+        response = user_client.get(url, HTTP_IF_NONE_MATCH=anonymous_etag)
+        assert response.status_code == HTTPStatus.OK
+
+
+def test_if_modified_since_alone_is_not_trusted(
+    mixer: Mixer, unlogged_client: Client, another_user, published_post
+):
+    url = f"/posts/{published_post.id}/"
+    unlogged_client.get(url)
+    mixer.blend("blog.Comment", post=published_post, author=another_user)
+    response = unlogged_client.get(
+        url, HTTP_IF_MODIFIED_SINCE=http_date(time.time() + 60)
+    )
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что страница, изменённая в ту же секунду, не получает"
+        " ответ 304 по заголовку If-Modified-Since."
+    )
+
+
+@pytest.mark.parametrize(
+    "renamed, urls",
+    (
+        ("user", ("/", "/posts/{id}/")),
+        ("another_user", ("/posts/{id}/",)),
+    ),
+)
+def test_rename_changes_validators(
+    request, mixer: Mixer, unlogged_client: Client, another_user,
+    published_post, renamed, urls
+):
+    mixer.blend("blog.Comment", post=published_post, author=another_user)
+    urls = [url.format(id=published_post.id) for url in urls]
+    etags = {url: unlogged_client.get(url)["ETag"] for url in urls}
+    renamed_user = request.getfixturevalue(renamed)
+    renamed_user.username = f"{renamed_user.username}-renamed"
+    renamed_user.save()
+    for url, etag in etags.items():
+        response = unlogged_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            f"Убедитесь, что после смены имени пользователя страница `{url}`"
+            " отдаётся заново, а не ответом 304."
+        )
+        assert renamed_user.username in response.content.decode("utf-8"), (
+            f"Убедитесь, что страница `{url}` показывает новое имя"
+            " пользователя."
+        )
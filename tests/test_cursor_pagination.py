@@ -0,0 +1,137 @@
+import base64
+from datetime import timedelta
+
+import pytest
+from django.core.paginator import InvalidPage
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blog.paginators import (
+    NEXT,
+    PREVIOUS,
+    CursorPaginator,
+    decode_cursor,
+    encode_cursor,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+PER_PAGE = 2
+
+
+@pytest.fixture
+def posts(mixer: Mixer, user, published_category):
+    """Seven posts, three of which share one ``pub_date``."""
+    now = timezone.now().replace(microsecond=0)
+    dates = [now - timedelta(days=days) for days in (1, 2, 2, 2, 3, 4, 5)]
+    return [
+        mixer.blend(
+            "blog.Post",
+            author=user,
+            category=published_category,
+            is_published=True,
+            pub_date=pub_date,
+        )
+        for pub_date in dates
+    ]
+
+
+def get_expected_order(posts):
+    return [
+        post.pk
+        for post in sorted(
+            posts, key=lambda post: (post.pub_date, post.pk), reverse=True
+        )
+    ]
+
+
+def walk(paginator, cursor, forward=True):
+    pages = []
+    while True:
+        page = paginator.page(cursor)
+        pages.append(page)
+        cursor = page.next_cursor if forward else page.previous_cursor
+        if cursor is None:
+            return pages
+
+
+def test_cursor_round_trip():
+    moment = timezone.now()
+    assert decode_cursor(encode_cursor(NEXT, (moment, 42))) == (
+        NEXT,
+        (moment, 42),
+    )
+    assert decode_cursor(encode_cursor(PREVIOUS)) == (PREVIOUS, None)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "!!!",
+        base64.urlsafe_b64encode(b"x|2020-01-01T00:00:00|1").decode(),
+        base64.urlsafe_b64encode(b"n|not-a-date|1").decode(),
+        base64.urlsafe_b64encode(b"n|2020-01-01T00:00:00|pk").decode(),
+        base64.urlsafe_b64encode(b"n|2020-01-01T00:00:00").decode(),
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+    ],
+    ids=[
+        "not-base64",
+        "direction",
+        "date",
+        "pk",
+        "no-pk",
+        "not-utf8",
+    ],
+)
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(InvalidPage):
+        decode_cursor(cursor)
+
+
+def test_invalid_cursor_gives_404(settings, client, posts):
+    settings.BLOG_CURSOR_PAGINATION = True
+    response = client.get("/", {"cursor": "!!!"})
+    assert response.status_code == 404, (
+        "Убедитесь, что при неверном курсоре страница возвращает"
+        " ошибку 404."
+    )
+
+
+def test_pages_forward_keep_order_with_ties(posts):
+    paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+    pages = walk(paginator, None)
+
+    assert [post.pk for page in pages for post in page] == (
+        get_expected_order(posts)
+    ), (
+        "Убедитесь, что при постраничном просмотре по курсору публикации"
+        " с одинаковой датой не теряются и не повторяются."
+    )
+    assert len(pages) == 4
+    assert not pages[0].has_previous()
+    assert pages[0].has_next()
+    assert not pages[-1].has_next()
+    assert pages[-1].has_previous()
+    assert all(len(page) == PER_PAGE for page in pages[:-1])
+
+
+def test_pages_backward_from_last_page(posts):
+    paginator = CursorPaginator(Post.objects.all(), PER_PAGE)
+    first = paginator.page(None)
+    pages = walk(paginator, first.last_cursor, forward=False)
+
+    assert not pages[0].has_next(), (
+        "Убедитесь, что курсор последней страницы ведёт на последнюю"
+        " страницу."
+    )
+    assert [post.pk for page in reversed(pages) for post in page] == (
+        get_expected_order(posts)
+    )
+    assert not pages[-1].has_previous()
+
+
+def test_empty_feed_has_one_empty_page():
+    page = CursorPaginator(Post.objects.all(), PER_PAGE).page(None)
+    assert len(page) == 0
+    assert not page.has_other_pages()
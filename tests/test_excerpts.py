@@ -0,0 +1,63 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from mixer.backend.django import Mixer
+
+from blog.models import Post, make_excerpt
+
+pytestmark = [pytest.mark.django_db]
+
+LONG_TEXT = " ".join(f"слово{number}" for number in range(30))
+
+
+@pytest.fixture
+def post(mixer: Mixer, user, published_category):
+    return mixer.blend(
+        "blog.Post", author=user, category=published_category, text="Начало"
+    )
+
+
+def test_excerpt_follows_changed_text(post):
+    assert post.excerpt == "Начало"
+    post.text = LONG_TEXT
+    post.save()
+    post.refresh_from_db()
+    assert post.excerpt == make_excerpt(LONG_TEXT), (
+        "Убедитесь, что при изменении текста публикации обновляется"
+        " его начало."
+    )
+
+    post.text = "Снова"
+    post.save(update_fields=["text"])
+    post.refresh_from_db()
+    assert post.excerpt == "Снова"
+
+
+def test_deferred_text_is_not_loaded_on_save(post):
+    feed_post = Post.objects.defer("text").get(pk=post.pk)
+    feed_post.title = "Новый заголовок"
+    with CaptureQueriesContext(connection) as context:
+        feed_post.save()
+    assert not any(
+        '"blog_post"."text"' in query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith("SELECT")
+    ), (
+        "Убедитесь, что сохранение публикации без загруженного текста"
+        " не загружает его ради начала текста."
+    )
+    post.refresh_from_db()
+    assert post.excerpt == "Начало"
+
+
+def test_update_fields_without_text_keep_excerpt(post):
+    Post.objects.filter(pk=post.pk).update(excerpt="Сохранённое")
+    post.refresh_from_db()
+    post.title = "Новый заголовок"
+    post.save(update_fields=["title"])
+    assert post.excerpt == "Сохранённое"
+    post.refresh_from_db()
+    assert post.excerpt == "Сохранённое", (
+        "Убедитесь, что save(update_fields=...) без текста не переписывает"
+        " начало текста."
+    )
@@ -0,0 +1,343 @@
+import re
+from datetime import timedelta
+from unittest.mock import patch
+
+import pytest
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.db import connection
+from django.test import Client
+from django.test.signals import template_rendered
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.cache import INDEX_SCOPE, bump_versions
+from blog.paginators import FeedPaginator
+from blog.services import (
+    expire_scheduled,
+    get_posts,
+    get_user_by_username,
+)
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def posts_in_two_categories(
+    mixer: Mixer, user, published_category, another_category
+):
+    return [
+        mixer.blend(
+            "blog.Post",
+            author=user,
+            category=category,
+            is_published=True,
+            pub_date=timezone.now() - timedelta(days=1),
+        )
+        for category in (published_category, another_category)
+    ]
+
+
+def test_feed_pages_are_served_from_cache(
+    unlogged_client: Client,
+    user,
+    posts_in_two_categories,
+    django_assert_num_queries,
+):
+    post = posts_in_two_categories[0]
+    urls = (
+        "/",
+        f"/category/{post.category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        unlogged_client.get(url)
+    for url in urls:
+        with django_assert_num_queries(0):
+            unlogged_client.get(url)
+
+
+def test_comment_invalidates_only_affected_feeds(
+    mixer: Mixer,
+    unlogged_client: Client,
+    another_user,
+    posts_in_two_categories,
+    django_assert_num_queries,
+):
+    commented_post, other_post = posts_in_two_categories
+    commented_url = f"/category/{commented_post.category.slug}/"
+    other_url = f"/category/{other_post.category.slug}/"
+    for url in ("/", commented_url, other_url):
+        unlogged_client.get(url)
+
+    mixer.blend("blog.Comment", post=commented_post, author=another_user)
+
+    with django_assert_num_queries(0):
+        unlogged_client.get(other_url)
+    for url in ("/", commented_url):
+        content = unlogged_client.get(url).content.decode("utf-8")
+        assert "Комментарии (1)" in content, (
+            "Убедитесь, что после добавления комментария лента"
+            f" `{url}` показывает новое количество комментариев."
+        )
+
+
+def test_post_cards_are_cached_by_revision(
+    unlogged_client: Client, posts_in_two_categories
+):
+    rendered_cards = []
+
+    def on_render(sender, template, **kwargs):
+        if template.name == "includes/post_card.html":
+            rendered_cards.append(template)
+
+    template_rendered.connect(on_render)
+    try:
+        unlogged_client.get("/")
+        assert len(rendered_cards) == len(posts_in_two_categories)
+
+        rendered_cards.clear()
+        unlogged_client.get("/?from=cache")
+        assert not rendered_cards, (
+            "Убедитесь, что карточки неизменённых публикаций берутся из кеша."
+        )
+
+        edited_post = posts_in_two_categories[0]
+        edited_post.title = "Новый заголовок"
+        edited_post.save()
+        content = unlogged_client.get("/").content.decode("utf-8")
+        assert len(rendered_cards) == 1
+        assert "Новый заголовок" in content
+    finally:
+        template_rendered.disconnect(on_render)
+
+
+def test_cached_page_is_shared_between_users(
+    user_client: Client,
+    another_user_client: Client,
+    unlogged_client: Client,
+    user,
+    another_user,
+    posts_in_two_categories,
+):
+    post = posts_in_two_categories[0]
+    for url in ("/", f"/posts/{post.id}/"):
+        user_client.get(url)
+        content = another_user_client.get(url).content.decode("utf-8")
+        assert f">{user.username}</a></button>" not in content, (
+            "Убедитесь, что в шапке страницы из кеша показан текущий"
+            " пользователь, а не тот, для кого страница была отрисована."
+        )
+        assert f">{another_user.username}</a></button>" in content
+
+        anonymous_content = unlogged_client.get(url).content.decode("utf-8")
+        assert "Войти" in anonymous_content
+        assert "<!--hole:" not in anonymous_content
+
+
+def test_cached_post_page_keeps_personal_parts(
+    mixer: Mixer,
+    user_client: Client,
+    another_user_client: Client,
+    unlogged_client: Client,
+    another_user,
+    posts_in_two_categories,
+):
+    post = posts_in_two_categories[0]
+    comment = mixer.blend("blog.Comment", post=post, author=another_user)
+    url = f"/posts/{post.id}/"
+    unlogged_client.get(url)
+
+    author_content = user_client.get(url).content.decode("utf-8")
+    assert f"/posts/{post.id}/edit/" in author_content
+    assert f"/posts/{post.id}/edit_comment/{comment.id}/" not in (
+        author_content
+    )
+
+    commenter_content = another_user_client.get(url).content.decode("utf-8")
+    assert f"/posts/{post.id}/edit/" not in commenter_content
+    assert f"/posts/{post.id}/edit_comment/{comment.id}/" in (
+        commenter_content
+    )
+    assert "csrfmiddlewaretoken" in commenter_content
+
+    reader_client = Client()
+    reader_client.force_login(mixer.blend("auth.User"))
+    reader_content = reader_client.get(url).content.decode("utf-8")
+    assert "csrfmiddlewaretoken" in reader_content, (
+        "Убедитесь, что на странице поста из кеша авторизованный"
+        " пользователь видит форму комментария."
+    )
+
+
+def test_scheduled_post_shows_up_in_cached_feeds(
+    mixer: Mixer, unlogged_client: Client, user, published_category
+):
+    publish_at = timezone.now() + timedelta(hours=1)
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=publish_at,
+    )
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        f"/profile/{user.username}/",
+    )
+    for url in urls:
+        assert post.title not in unlogged_client.get(url).content.decode(
+            "utf-8"
+        )
+
+    later = publish_at + timedelta(minutes=1)
+    with patch("django.utils.timezone.now", return_value=later):
+        for url in urls:
+            content = unlogged_client.get(url).content.decode("utf-8")
+            assert post.title in content, (
+                "Убедитесь, что отложенная публикация появляется в ленте"
+                f" `{url}` с наступлением даты публикации, даже если"
+                " страница уже была в кеше."
+            )
+
+
+def test_feed_count_is_cached_until_feed_changes(
+    mixer: Mixer, unlogged_client: Client, user, posts_in_two_categories
+):
+    def count_queries(url):
+        with CaptureQueriesContext(connection) as queries:
+            unlogged_client.get(url)
+        return [q["sql"] for q in queries if "COUNT(" in q["sql"]]
+
+    assert count_queries("/")
+    assert not count_queries("/?page=1"), (
+        "Убедитесь, что количество публикаций ленты берётся из кеша,"
+        " пока лента не изменилась."
+    )
+
+    mixer.blend(
+        "blog.Post",
+        author=user,
+        category=posts_in_two_categories[0].category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    assert count_queries("/?page=1")
+
+
+def test_huge_feed_is_counted_by_estimate(
+    monkeypatch, settings, posts_in_two_categories
+):
+    settings.BLOG_EXACT_COUNT_LIMIT = 1
+    monkeypatch.setattr(
+        "blog.paginators.estimate_count", lambda queryset: 1000
+    )
+    paginator = FeedPaginator(get_posts(), 1, [INDEX_SCOPE], "public")
+
+    assert paginator.count == 1000 and paginator.is_estimated
+    assert len(paginator.page(2)) == 1
+    with pytest.raises(EmptyPage):
+        paginator.page(3)
+
+
+def test_feed_without_estimate_is_counted_once(
+    settings, posts_in_two_categories, django_assert_num_queries
+):
+    settings.BLOG_EXACT_COUNT_LIMIT = 1
+    paginator = FeedPaginator(get_posts(), 1, [INDEX_SCOPE], "public")
+    with django_assert_num_queries(1):
+        assert paginator.count == 2 and not paginator.is_estimated
+
+
+def test_feed_count_follows_unpublished_category(
+    posts_in_two_categories, another_category
+):
+    def count():
+        return FeedPaginator(get_posts(), 1, [INDEX_SCOPE], "public").count
+
+    assert count() == 2
+    another_category.is_published = False
+    another_category.save()
+    assert count() == 1, (
+        "Убедитесь, что после снятия категории с публикации количество"
+        " публикаций в ленте пересчитывается."
+    )
+
+
+def test_page_links_are_elided(
+    mixer: Mixer, unlogged_client: Client, user, published_category
+):
+    mixer.cycle(150).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+    content = unlogged_client.get("/?page=8").content.decode("utf-8")
+    linked_pages = set(re.findall(r'href="\?page=(\d+)"', content))
+
+    assert linked_pages == {"1", "6", "7", "9", "10", "15"}, (
+        "Убедитесь, что пагинатор показывает первую и последнюю страницы"
+        " и только несколько страниц вокруг текущей."
+    )
+    assert "…" in content
+
+
+def test_profile_owner_is_looked_up_from_cache(
+    unlogged_client: Client, user, posts_in_two_categories
+):
+    url = f"/profile/{user.username}/"
+    unlogged_client.get(url)
+    with CaptureQueriesContext(connection) as queries:
+        assert unlogged_client.get(f"{url}?page=1").status_code == 200
+    assert not [q for q in queries if '"auth_user"' in q["sql"]], (
+        "Убедитесь, что страница профиля берёт пользователя из кеша"
+        " и не присоединяет таблицу пользователей к запросу публикаций."
+    )
+
+    old_username = user.username
+    user.username = f"{old_username}-renamed"
+    user.save()
+    assert unlogged_client.get(url).status_code == 404, (
+        "Убедитесь, что после смены имени пользователя страница по"
+        " старому имени больше не открывается."
+    )
+    assert unlogged_client.get(f"/profile/{user.username}/").status_code == 200
+
+
+def test_cached_profile_owner_has_no_secrets(user):
+    get_user_by_username(user.username)
+    cached = repr(cache.get(f"blog:user:{user.username}"))
+    for secret in (user.password, user.email):
+        assert secret not in cached, (
+            "Убедитесь, что в кеше профиля не хранятся пароль и адрес"
+            " электронной почты пользователя."
+        )
+    assert "is_superuser" not in cached
+
+
+def test_scheduled_lookups_do_not_pile_up(settings, monkeypatch):
+    writes = []
+    set_many = cache.set_many
+
+    def record(data, timeout=None, **kwargs):
+        writes.extend(
+            (key, timeout) for key in data if key.startswith("blog:scheduled")
+        )
+        return set_many(data, timeout, **kwargs)
+
+    monkeypatch.setattr(cache, "set_many", record)
+    for _ in range(3):
+        bump_versions([INDEX_SCOPE])
+        expire_scheduled([INDEX_SCOPE])
+
+    assert writes == [
+        ("blog:scheduled:index", settings.BLOG_PAGE_CACHE_TIMEOUT)
+    ] * 3, (
+        "Убедитесь, что момент следующей публикации хранится под одним"
+        " ключом на область и с ограниченным временем жизни."
+    )
@@ -0,0 +1,328 @@
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.utils import timezone
+from mixer.backend.django import Mixer
+from PIL import Image
+
+from blog import blobs
+from blog.cache import EAGER_CARDS
+from blog.images import RENDITION_WIDTHS, Rendition
+from blog.models import ImageBlob, ImageJob, Post
+from blog.storage import is_hashed_name
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def make_upload(size=(2400, 1200), format="JPEG", name="photo.jpg"):
+    buffer = BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, format)
+    return SimpleUploadedFile(name, buffer.getvalue())
+
+
+@pytest.fixture
+def post_with_image(mixer: Mixer, user, published_category):
+    post = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+        image=None,
+    )
+    post.image = make_upload()
+    post.save()
+    process_images()
+    post.refresh_from_db()
+    return post
+
+
+def process_images(workers=0):
+    call_command("process_images", once=True, workers=workers)
+
+
+def test_renditions_are_rendered_on_upload(post_with_image):
+    renditions = {
+        Rendition.parse(key): name
+        for key, name in post_with_image.renditions.items()
+    }
+    assert {
+        (rendition.width, rendition.format) for rendition in renditions
+    } == {
+        (width, format)
+        for width in RENDITION_WIDTHS
+        for format in ("WEBP", "JPEG")
+    }, (
+        "Убедитесь, что изображение публикации перекодируется в WebP"
+        " и JPEG во всех нужных размерах."
+    )
+    storage = post_with_image.image.storage
+    for rendition, name in renditions.items():
+        with storage.open(name) as file, Image.open(file) as image:
+            assert image.format == rendition.format
+            assert image.size == (rendition.width, rendition.height)
+            assert rendition.height == rendition.width // 2
+
+
+def test_small_images_are_not_upscaled(post_with_image):
+    post_with_image.image = make_upload((300, 200), "PNG", "small.png")
+    post_with_image.save()
+    process_images()
+    post_with_image.refresh_from_db()
+
+    assert set(post_with_image.renditions) == {"300x200.WEBP", "300x200.PNG"}
+    storage = post_with_image.image.storage
+    for name in post_with_image.renditions.values():
+        with storage.open(name) as file, Image.open(file) as image:
+            assert image.size == (300, 200)
+
+
+def test_feed_shows_responsive_picture(client, post_with_image):
+    content = client.get("/").content.decode("utf-8")
+    storage = post_with_image.image.storage
+    renditions = post_with_image.renditions
+    webp = ", ".join(
+        f"{storage.url(renditions[f'{width}x{width // 2}.WEBP'])} {width}w"
+        for width in RENDITION_WIDTHS
+    )
+    assert f'<source type="image/webp" srcset="{webp}"' in content, (
+        "Убедитесь, что в ленте для изображения указаны копии в формате"
+        " WebP всех размеров."
+    )
+    card_url = storage.url(renditions["640x320.JPEG"])
+    assert f'src="{card_url}"' in content, (
+        "Убедитесь, что в ленте показывается уменьшенная копия изображения,"
+        " а не оригинал."
+    )
+    assert 'width="640" height="320"' in content
+    assert f'src="{post_with_image.image.url}"' not in content
+
+
+def test_cards_below_the_fold_are_lazy(
+    mixer: Mixer, client, user, published_category, post_with_image
+):
+    posts = mixer.cycle(EAGER_CARDS).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now(),
+        image=None,
+    )
+    content = client.get("/").content.decode("utf-8")
+    assert 'loading="lazy"' in content, (
+        "Убедитесь, что изображения карточек ниже первого экрана"
+        " загружаются лениво."
+    )
+
+    Post.objects.filter(pk__in=[post.pk for post in posts]).delete()
+    content = client.get("/").content.decode("utf-8")
+    assert 'loading="lazy"' not in content, (
+        "Убедитесь, что изображения первых карточек загружаются сразу."
+    )
+
+
+def test_placeholder_is_shown_until_renditions_are_ready(
+    client, post_with_image
+):
+    post_with_image.image = make_upload((1600, 900), name="another.jpg")
+    post_with_image.save()
+
+    content = client.get("/").content.decode("utf-8")
+    assert "img/image-placeholder.svg" in content, (
+        "Убедитесь, что пока изображение обрабатывается, в ленте"
+        " показывается заглушка."
+    )
+
+    process_images(workers=2)
+    post_with_image.refresh_from_db()
+    content = client.get("/").content.decode("utf-8")
+    assert "img/image-placeholder.svg" not in content
+    assert post_with_image.renditions["640x360.JPEG"] in content, (
+        "Убедитесь, что после обработки в очереди лента показывает"
+        " уменьшенную копию нового изображения."
+    )
+
+
+def test_unreadable_image_falls_back_to_original(post_with_image, media_root):
+    post_with_image.image = "post_images/broken.jpg"
+    (media_root / "post_images" / "broken.jpg").write_bytes(b"not an image")
+    post_with_image.save()
+    process_images()
+    post_with_image.refresh_from_db()
+
+    assert post_with_image.renditions == {
+        "original": "post_images/broken.jpg"
+    }
+
+
+def test_same_image_is_stored_once(
+    mixer: Mixer, user, published_category, post_with_image
+):
+    copy = mixer.blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        image=None,
+    )
+    copy.image = make_upload(name="copy.jpg")
+    copy.save()
+    process_images()
+    copy.refresh_from_db()
+
+    assert copy.image.name == post_with_image.image.name, (
+        "Убедитесь, что одинаковые изображения хранятся в одном файле."
+    )
+    assert copy.renditions == post_with_image.renditions
+    blob = ImageBlob.objects.get(name=copy.image.name)
+    assert blob.references == 2
+
+
+def test_unused_images_are_collected(post_with_image, media_root):
+    names = [post_with_image.image.name, *post_with_image.renditions.values()]
+    post_with_image.delete()
+
+    call_command("collect_images", grace_hours=1)
+    assert all((media_root / name).exists() for name in names), (
+        "Убедитесь, что недавно освободившиеся файлы не удаляются."
+    )
+
+    ImageBlob.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+    old = (timezone.now() - timedelta(hours=2)).timestamp()
+    for name in names:
+        os.utime(media_root / name, (old, old))
+    call_command("collect_images", grace_hours=1)
+    assert not any((media_root / name).exists() for name in names), (
+        "Убедитесь, что файлы удалённой публикации удаляются сборщиком."
+    )
+    assert not ImageBlob.objects.exists()
+
+
+def test_file_touched_during_collection_is_kept(
+    post_with_image, media_root, monkeypatch
+):
+    names = [post_with_image.image.name, *post_with_image.renditions.values()]
+    post_with_image.delete()
+    ImageBlob.objects.update(updated_at=timezone.now() - timedelta(hours=2))
+    checked = set()
+
+    def is_recent(name, since):
+        # The first check passes, then a re-upload touches the file.
+        if name in checked:
+            return True
+        checked.add(name)
+        return False
+
+    monkeypatch.setattr(blobs, "_is_recent", is_recent)
+    call_command("collect_images", grace_hours=1)
+
+    assert all((media_root / name).exists() for name in names), (
+        "Убедитесь, что файл, загруженный снова во время сборки мусора,"
+        " не удаляется."
+    )
+    assert ImageBlob.objects.count() == len(set(names))
+
+
+def test_migrate_images_moves_files(post_with_image, media_root):
+    (media_root / "post_images").mkdir(exist_ok=True)
+    legacy = media_root / "post_images" / "legacy.jpg"
+    legacy.write_bytes((media_root / post_with_image.image.name).read_bytes())
+    Post.objects.filter(pk=post_with_image.pk).update(
+        image="post_images/legacy.jpg", renditions={}
+    )
+
+    call_command("migrate_images")
+    post_with_image.refresh_from_db()
+
+    assert post_with_image.image.name != "post_images/legacy.jpg"
+    assert is_hashed_name(post_with_image.image.name), (
+        "Убедитесь, что команда migrate_images переносит изображения"
+        " в хранилище с именами по содержимому."
+    )
+    assert not legacy.exists()
+    assert ImageBlob.objects.get(
+        name=post_with_image.image.name
+    ).references == 1
+
+
+def test_stuck_jobs_are_released_while_polling(post_with_image, monkeypatch):
+    sleeps = []
+
+    def sleep(seconds):
+        sleeps.append(seconds)
+        if len(sleeps) > 1:
+            raise KeyboardInterrupt
+        ImageJob.objects.create(
+            post=post_with_image,
+            image=post_with_image.image.name,
+            status=ImageJob.Status.RUNNING,
+            started_at=timezone.now() - timedelta(hours=1),
+        )
+
+    monkeypatch.setattr(
+        "blog.management.commands.process_images.time.sleep", sleep
+    )
+    call_command("process_images", workers=0, poll_interval=0)
+
+    assert not ImageJob.objects.exclude(
+        status=ImageJob.Status.DONE
+    ).exists(), (
+        "Убедитесь, что задачи умершего обработчика возвращаются в очередь"
+        " и без перезапуска команды process_images."
+    )
+
+
+def test_broken_pool_is_replaced(post_with_image, monkeypatch):
+    pools = []
+
+    class CrashingPool:
+        """The first pool loses a worker; the ones started after it work."""
+
+        def __init__(self, workers):
+            self.broken = not pools
+            self.is_shut_down = False
+            pools.append(self)
+
+        def submit(self, fn, *args):
+            if self.is_shut_down:
+                raise RuntimeError("cannot schedule new futures")
+            future = Future()
+            if self.broken:
+                future.set_exception(BrokenProcessPool("worker died"))
+            else:
+                future.set_result(fn(*args))
+            return future
+
+        def shutdown(self, **kwargs):
+            self.is_shut_down = True
+
+    monkeypatch.setattr(
+        "blog.management.commands.process_images.ProcessPoolExecutor",
+        CrashingPool,
+    )
+    post_with_image.image = make_upload((1600, 900), name="another.jpg")
+    post_with_image.save()
+    process_images(workers=2)
+
+    assert len(pools) == 2 and pools[0].is_shut_down, (
+        "Убедитесь, что команда process_images заменяет сломанный пул"
+        " процессов новым."
+    )
+    assert not ImageJob.objects.exclude(
+        status=ImageJob.Status.DONE
+    ).exists(), (
+        "Убедитесь, что задачи из сломанного пула возвращаются в очередь"
+        " и обрабатываются новым пулом."
+    )
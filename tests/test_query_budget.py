@@ -0,0 +1,78 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.test import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.middleware import QueryBudgetExceeded
+from conftest import N_PER_PAGE
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture
+def commented_posts(
+    mixer: Mixer, user, another_user, published_location, published_category
+):
+    posts = mixer.cycle(N_PER_PAGE * 2).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        location=published_location,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+    for post in posts:
+        mixer.cycle(3).blend("blog.Comment", post=post, author=another_user)
+    return posts
+
+
+def test_feeds_fit_query_budget(
+    user_client: Client, unlogged_client: Client, user, commented_posts
+):
+    post = commented_posts[0]
+    urls = (
+        "/",
+        "/?page=2",
+        f"/category/{post.category.slug}/",
+        f"/profile/{user.username}/",
+        f"/posts/{post.id}/",
+    )
+    for client in (user_client, unlogged_client):
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.OK, (
+                f"Убедитесь, что страница `{url}` загружается без ошибок."
+            )
+
+
+def test_edit_views_fit_query_budget(
+    user_client: Client, another_user_client: Client, commented_posts
+):
+    post = commented_posts[0]
+    comment = post.comments.first()
+    user_client.get(f"/posts/{post.id}/edit/")
+    user_client.get("/posts/create/")
+    user_client.get("/profile/edit/")
+    user_client.post(f"/posts/{post.id}/comment/", {"text": "Текст"})
+    another_user_client.get(
+        f"/posts/{post.id}/edit_comment/{comment.id}/"
+    )
+    another_user_client.post(
+        f"/posts/{post.id}/edit_comment/{comment.id}/", {"text": "Текст"}
+    )
+    another_user_client.post(
+        f"/posts/{post.id}/delete_comment/{comment.id}/"
+    )
+    user_client.post(f"/posts/{post.id}/delete/")
+
+
+def test_query_budget_violation_fails(
+    settings, user_client: Client, commented_posts
+):
+    settings.QUERY_BUDGETS = {**settings.QUERY_BUDGETS, "blog:index": 1}
+    with pytest.raises(QueryBudgetExceeded) as exc_info:
+        user_client.get("/")
+    assert "blog:index" in str(exc_info.value)
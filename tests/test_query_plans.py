@@ -0,0 +1,17 @@
+import pytest
+from django.core.management import call_command
+
+pytestmark = [pytest.mark.django_db]
+
+
+def test_feed_queries_use_indexes(mixer):
+    # The feeds leave out the posts of unpublished categories.
+    mixer.cycle(2).blend("blog.Category", is_published=False)
+    try:
+        call_command('check_query_plans')
+    except Exception as e:
+        raise AssertionError(
+            "Убедитесь, что запросы лент публикаций и комментариев"
+            " используют индексы, а не полное сканирование таблиц"
+            f" и сортировку во временном B-дереве:\n{e}"
+        )
@@ -0,0 +1,160 @@
+import struct
+import zlib
+from io import BytesIO
+
+import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+
+from blog.models import Post
+
+pytestmark = [pytest.mark.django_db]
+
+
+@pytest.fixture(autouse=True)
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = tmp_path
+    return tmp_path
+
+
+def make_png_header(width, height):
+    """A PNG that declares the size but holds almost no pixel data."""
+
+    def chunk(kind, data):
+        crc = zlib.crc32(kind + data) & 0xFFFFFFFF
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(
+            ">I", crc
+        )
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(b"\x00"))
+        + chunk(b"IEND", b"")
+    )
+
+
+def make_jpeg(size=(800, 600)):
+    buffer = BytesIO()
+    Image.new("RGB", size, "teal").save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def post_data(published_category, published_location):
+    return {
+        "title": "Заголовок",
+        "text": "Текст",
+        "pub_date": timezone.now().strftime("%Y-%m-%d %H:%M"),
+        "category": published_category.pk,
+        "location": published_location.pk,
+    }
+
+
+def create_post(client, post_data, content, name="photo.png"):
+    return client.post(
+        reverse("blog:create_post"),
+        {**post_data, "image": SimpleUploadedFile(name, content)},
+    )
+
+
+def get_image_errors(response):
+    assert response.status_code == 200, (
+        "Убедитесь, что при ошибке в изображении форма показывается снова."
+    )
+    return response.context["form"].errors.get("image")
+
+
+def test_valid_image_is_accepted(user_client, post_data):
+    response = create_post(
+        user_client, post_data, make_jpeg(), "photo.jpg"
+    )
+    assert response.status_code == 302, response.context["form"].errors
+    assert Post.objects.get().image
+
+
+def test_oversized_upload_is_rejected(
+    settings, user_client, post_data
+):
+    settings.BLOG_UPLOAD_MAX_BYTES = 1024
+    response = create_post(
+        user_client, post_data, make_jpeg(), "photo.jpg"
+    )
+    assert get_image_errors(response), (
+        "Убедитесь, что файл больше BLOG_UPLOAD_MAX_BYTES не принимается."
+    )
+    assert not Post.objects.exists()
+
+
+@pytest.mark.parametrize(
+    "size, limits, message",
+    [
+        ((20000, 10), {}, "по стороне"),
+        (
+            (9000, 9000),
+            {"BLOG_IMAGE_MAX_PIXELS": 50_000_000},
+            "мегапикселей",
+        ),
+        (
+            (30000, 30000),
+            {"BLOG_IMAGE_MAX_SIDE": 100_000},
+            "мегапикселей",
+        ),
+    ],
+    ids=["side", "pixels", "bomb"],
+)
+def test_huge_image_is_rejected_by_header(
+    settings, user_client, post_data, size, limits, message, monkeypatch
+):
+    for name, value in limits.items():
+        setattr(settings, name, value)
+
+    def load(*args, **kwargs):
+        raise AssertionError("Изображение не должно декодироваться.")
+
+    monkeypatch.setattr(Image.Image, "load", load)
+    response = create_post(
+        user_client, post_data, make_png_header(*size)
+    )
+    errors = get_image_errors(response)
+    assert errors and message in errors[0], (
+        "Убедитесь, что изображения слишком большого размера отклоняются"
+        " по заголовку файла нужной проверкой."
+    )
+    assert not Post.objects.exists()
+
+
+def test_pixel_count_is_limited(settings, user_client, post_data):
+    settings.BLOG_IMAGE_MAX_PIXELS = 100_000
+    response = create_post(
+        user_client, post_data, make_jpeg(), "photo.jpg"
+    )
+    assert get_image_errors(response), (
+        "Убедитесь, что изображения с числом пикселей больше"
+        " BLOG_IMAGE_MAX_PIXELS не принимаются."
+    )
+
+
+def test_admin_checks_image_header(admin_client, user, post_data):
+    response = admin_client.post(
+        reverse("admin:blog_post_add"),
+        {
+            **post_data,
+            "pub_date_0": timezone.now().strftime("%Y-%m-%d"),
+            "pub_date_1": timezone.now().strftime("%H:%M:%S"),
+            "author": user.pk,
+            "is_published": "on",
+            "image": SimpleUploadedFile(
+                "photo.png", make_png_header(20000, 10)
+            ),
+        },
+    )
+    assert response.status_code == 200
+    errors = response.context["adminform"].form.errors.get("image")
+    assert errors and "по стороне" in errors[0], (
+        "Убедитесь, что изображения, загруженные через админку, проверяются"
+        " так же, как и на сайте."
+    )
+    assert not Post.objects.exists()
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+import pytest
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+
+@pytest.mark.django_db(transaction=True)
+def test_warm_caches_prerenders_feeds_and_posts(
+    mixer: Mixer, user, published_category, django_assert_num_queries
+):
+    posts = mixer.cycle(3).blend(
+        "blog.Post",
+        author=user,
+        category=published_category,
+        is_published=True,
+        pub_date=timezone.now() - timedelta(days=1),
+    )
+
+    call_command("warm_caches", pages=1, concurrency=2, process_local=True)
+
+    client = Client()
+    urls = (
+        "/",
+        f"/category/{published_category.slug}/",
+        *(f"/posts/{post.id}/" for post in posts),
+    )
+    for url in urls:
+        with django_assert_num_queries(0):
+            response = client.get(url)
+        assert response.status_code == 200, (
+            f"Убедитесь, что команда `warm_caches` заранее кладёт страницу"
+            f" `{url}` в кеш."
+        )
+
+
+@pytest.mark.django_db
+def test_warm_caches_refuses_process_local_cache():
+    with pytest.raises(CommandError):
+        call_command("warm_caches")